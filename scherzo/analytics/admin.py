@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import CourseActivity, Watermark
+
+
+@admin.register(CourseActivity)
+class CourseActivityAdmin(admin.ModelAdmin):
+    list_display = ['course', 'module', 'day', 'enrollments', 'views']
+    list_select_related = ['course', 'module']
+    date_hierarchy = 'day'
+
+
+@admin.register(Watermark)
+class WatermarkAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_event_id', 'updated']
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    name = 'analytics'
+
+    def ready(self):
+        from tracks.exports import register_report
+        from tracks.ranking import register_ranking
+        from . import signals  # noqa
+        from .exports import PROGRESS_HEADER, progress_rows
+        from .ranking import by_recent_views
+        register_report('progress', PROGRESS_HEADER, progress_rows)
+        register_ranking(by_recent_views)
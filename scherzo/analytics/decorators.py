@@ -0,0 +1,26 @@
+from functools import wraps
+
+from django.utils.cache import add_never_cache_headers
+
+from .models import Event
+
+
+def record_course_view(view):
+    """Log a view event for every successful request to a course page.
+    Wrap it around cache_page so views served from the cache are counted
+    as well. The response is marked uncacheable, so neither the site-wide
+    cache middleware nor the browser serves it without coming back here;
+    for a template response that happens after rendering, once cache_page
+    has stored its copy."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and request.user.is_authenticated:
+            Event.objects.create(kind=Event.VIEW, course_id=kwargs['pk'],
+                                 module_id=kwargs.get('module_id'), user=request.user)
+        if getattr(response, 'is_rendered', True):
+            add_never_cache_headers(response)
+        else:
+            response.add_post_render_callback(add_never_cache_headers)
+        return response
+    return wrapper
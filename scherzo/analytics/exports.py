@@ -0,0 +1,28 @@
+"""
+Progress report of the students of a course, registered with the tracks
+exports by AnalyticsConfig.ready().
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import Count
+
+from tracks.exports import chunks
+from .models import ModuleProgress
+
+
+PROGRESS_HEADER = ('id', 'username', 'modules_viewed', 'total_modules')
+
+
+def progress_rows(course):
+    """Number of distinct modules each enrolled student has viewed, as of
+    the last aggregate_analytics run"""
+    total_modules = course.modules.count()
+    students = User.objects.filter(courses_enrolled=course)
+    for chunk in chunks(students, ('id', 'username')):
+        viewed = ModuleProgress.objects.filter(course=course, user_id__in=[id for id, username in chunk]) \
+                                       .values('user') \
+                                       .annotate(modules=Count('module')) \
+                                       .order_by()
+        viewed = {row['user']: row['modules'] for row in viewed}
+        for id, username in chunk:
+            yield (id, username, viewed.get(id, 0), total_modules)
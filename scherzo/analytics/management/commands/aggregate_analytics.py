@@ -0,0 +1,95 @@
+"""
+Roll the events logged since the last run up into daily CourseActivity
+rows and per-student ModuleProgress rows.  Run it from cron; each batch claims its range of event ids by
+moving the watermark in the same transaction that adds to the activity
+rows, so neither an interrupted run nor two overlapping runs count an
+event twice.  Events younger than --lag seconds are left for the next
+run, so events whose transaction commits after a higher id has been
+written aren't skipped.
+
+    python manage.py aggregate_analytics --batch-size 10000 --delete-processed
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from analytics.models import Event, CourseActivity, ModuleProgress, Watermark
+
+
+WATERMARK = 'course_activity'
+
+
+class Command(BaseCommand):
+    help = 'Aggregate new enrollment and view events into course activity.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Number of event ids rolled up per transaction.')
+        parser.add_argument('--lag', type=int, default=60,
+                            help='Leave events younger than LAG seconds for the next run.')
+        parser.add_argument('--delete-processed', action='store_true',
+                            help='Delete events once they are aggregated.')
+
+    def handle(self, *args, **options):
+        Watermark.objects.get_or_create(name=WATERMARK)
+        cutoff = timezone.now() - timedelta(seconds=options['lag'])
+        last_id = Event.objects.filter(created__lt=cutoff).order_by('-id').values_list('id', flat=True).first()
+
+        rows = 0
+        while last_id is not None:
+            with transaction.atomic():
+                start = Watermark.objects.select_for_update() \
+                                         .values_list('last_event_id', flat=True) \
+                                         .get(name=WATERMARK)
+                if start >= last_id:
+                    break
+                end = min(start + options['batch_size'], last_id)
+                if not self.claim(start, end):
+                    # another run moved the watermark in between
+                    continue
+                rows += self.aggregate(start, end)
+                self.aggregate_progress(start, end)
+                if options['delete_processed']:
+                    Event.objects.filter(id__gt=start, id__lte=end).delete()
+        self.stdout.write('Aggregated events up to {} into {} rows.'.format(last_id or 0, rows))
+
+    def claim(self, start, end):
+        """Move the watermark from start to end, unless it is no longer at start"""
+        return Watermark.objects.filter(name=WATERMARK, last_event_id=start).update(last_event_id=end) == 1
+
+    def aggregate(self, start, end):
+        """Add the events with start < id <= end to the activity rows"""
+        totals = Event.objects.filter(id__gt=start, id__lte=end) \
+                              .annotate(day=TruncDate('created')) \
+                              .values('course', 'module', 'day', 'kind') \
+                              .annotate(total=Count('id')) \
+                              .order_by()
+        rows = 0
+        for row in totals:
+            field = 'enrollments' if row['kind'] == Event.ENROLLMENT else 'views'
+            lookup = {'course_id': row['course'], 'module_id': row['module'], 'day': row['day']}
+            updated = CourseActivity.objects.filter(**lookup).update(**{field: F(field) + row['total']})
+            if not updated:
+                CourseActivity.objects.create(**dict(lookup, **{field: row['total']}))
+            rows += 1
+        return rows
+
+    def aggregate_progress(self, start, end):
+        """Add the module views with start < id <= end to the progress rows"""
+        views = Event.objects.filter(id__gt=start, id__lte=end, kind=Event.VIEW,
+                                     module__isnull=False, user__isnull=False) \
+                             .values('user', 'course', 'module') \
+                             .annotate(total=Count('id'), first_viewed=Min('created')) \
+                             .order_by()
+        for row in views:
+            updated = ModuleProgress.objects.filter(user_id=row['user'], module_id=row['module']) \
+                                            .update(views=F('views') + row['total'])
+            if not updated:
+                ModuleProgress.objects.create(user_id=row['user'], course_id=row['course'],
+                                              module_id=row['module'], views=row['total'],
+                                              first_viewed=row['first_viewed'])
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2026-10-19 07:09
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def backfill_progress(apps, schema_editor):
+    """Roll up the module views already aggregated into activity rows;
+    later ones are rolled up by aggregate_analytics"""
+    Event = apps.get_model('analytics', 'Event')
+    ModuleProgress = apps.get_model('analytics', 'ModuleProgress')
+    Watermark = apps.get_model('analytics', 'Watermark')
+    last_id = Watermark.objects.filter(name='course_activity').values_list('last_event_id', flat=True).first()
+    if not last_id:
+        return
+    views = Event.objects.filter(kind='view', id__lte=last_id, module__isnull=False, user__isnull=False) \
+                         .values('user', 'course', 'module') \
+                         .annotate(views=Count('id'), first_viewed=Min('created')) \
+                         .order_by()
+    ModuleProgress.objects.bulk_create(
+        ModuleProgress(user_id=row['user'], course_id=row['course'], module_id=row['module'],
+                       views=row['views'], first_viewed=row['first_viewed'])
+        for row in views)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracks', '0009_track_title_index'),
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModuleProgress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('first_viewed', models.DateTimeField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracks.Course')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='tracks.Module')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='module_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'module progress',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='moduleprogress',
+            unique_together=set([('user', 'module')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='moduleprogress',
+            index_together=set([('course', 'user')]),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+"""
+Course popularity is computed offline. Enrollments and module views are
+logged as events, and the aggregate_analytics command rolls new events
+up into daily CourseActivity rows, which is what the dashboards read,
+and into ModuleProgress rows, which the progress export reads.
+"""
+
+from django.db import models
+from django.contrib.auth.models import User
+
+from tracks.models import Course, Module
+
+
+class Event(models.Model):
+    """A single enrollment or module view, kept until it is aggregated"""
+    ENROLLMENT = 'enroll'
+    VIEW = 'view'
+    KIND_CHOICES = (
+        (ENROLLMENT, 'Enrollment'),
+        (VIEW, 'View'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    course = models.ForeignKey(Course, related_name='+')
+    module = models.ForeignKey(Module, related_name='+', null=True, blank=True)
+    user = models.ForeignKey(User, related_name='+', null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '{} {}'.format(self.kind, self.course_id)
+
+
+class CourseActivity(models.Model):
+    """Enrollments and views of a course for one day. Views of a module
+    are kept in rows with the module set; enrollments and views of the
+    course overview have no module."""
+    course = models.ForeignKey(Course, related_name='activity')
+    module = models.ForeignKey(Module, related_name='activity', null=True, blank=True)
+    day = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-day',)
+        unique_together = ('course', 'module', 'day')
+        verbose_name_plural = 'course activity'
+
+    def __str__(self):
+        return '{} {}'.format(self.course_id, self.day)
+
+
+class ModuleProgress(models.Model):
+    """Views of a module by one student. Unlike the events it is rolled
+    up from, it is never deleted."""
+    user = models.ForeignKey(User, related_name='module_progress')
+    course = models.ForeignKey(Course, related_name='+')
+    module = models.ForeignKey(Module, related_name='progress')
+    views = models.PositiveIntegerField(default=0)
+    first_viewed = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'module')
+        index_together = [['course', 'user']]
+        verbose_name_plural = 'module progress'
+
+    def __str__(self):
+        return '{} {}'.format(self.user_id, self.module_id)
+
+
+class Watermark(models.Model):
+    """Last event already rolled up by an aggregation"""
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '{}: {}'.format(self.name, self.last_event_id)
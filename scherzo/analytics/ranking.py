@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from django.db.models import Sum, Case, When, Value, PositiveIntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def by_recent_views(courses, days):
+    """Annotate the courses with their views over the last days days,
+    summed from the activity rows"""
+    since = timezone.now().date() - timedelta(days=days)
+    recent_views = Case(When(activity__day__gte=since, then='activity__views'),
+                        default=0, output_field=PositiveIntegerField())
+    return courses.annotate(traffic=Coalesce(Sum(recent_views), Value(0)))
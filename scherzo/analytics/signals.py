@@ -0,0 +1,18 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from tracks.models import Course
+from .models import Event
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def record_enrollments(sender, instance, action, reverse, pk_set, **kwargs):
+    """Log an enrollment event for every student added to a course,
+    whichever side of the relation they were added from"""
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        events = [Event(kind=Event.ENROLLMENT, course_id=pk, user=instance) for pk in pk_set]
+    else:
+        events = [Event(kind=Event.ENROLLMENT, course=instance, user_id=pk) for pk in pk_set]
+    Event.objects.bulk_create(events)
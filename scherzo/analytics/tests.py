@@ -0,0 +1,144 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tracks.exports import export_lines
+from tracks.models import Track, Course, Module
+from tracks.ranking import popular_courses
+from .management.commands.aggregate_analytics import Command as AggregateCommand, WATERMARK
+from .models import Event, CourseActivity, Watermark
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class AnalyticsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_superuser('teacher', 'teacher@example.com', 'secret')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'secret')
+        track = Track.objects.create(title='Grade 1', slug='grade-1')
+        cls.course = Course.objects.create(owner=cls.teacher, track=track, title='Scales',
+                                           slug='scales', overview='Major and minor scales')
+        cls.module = Module.objects.create(course=cls.course, title='C major')
+
+    def log_views(self, count, module=None, age=timedelta(minutes=5)):
+        Event.objects.bulk_create([Event(kind=Event.VIEW, course=self.course, module=module or self.module,
+                                         user=self.student) for i in range(count)])
+        Event.objects.update(created=timezone.now() - age)
+
+    def aggregate(self, *args):
+        call_command('aggregate_analytics', *args, stdout=StringIO())
+
+    def activity(self):
+        return list(CourseActivity.objects.values_list('module', 'enrollments', 'views'))
+
+
+class EventLoggingTest(AnalyticsTestCase):
+
+    def test_enrollments_are_logged_from_both_sides(self):
+        self.course.students.add(self.student)
+        self.teacher.courses_enrolled.add(self.course)
+        events = Event.objects.filter(kind=Event.ENROLLMENT, course=self.course)
+        self.assertEqual(sorted(events.values_list('user', flat=True)), [self.teacher.pk, self.student.pk])
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_views_are_logged_even_when_cached(self):
+        self.course.students.add(self.student)
+        self.client.force_login(self.student)
+        url = reverse('student_course_detail_module', args=[self.course.id, self.module.id])
+        responses = [self.client.get(url) for i in range(2)]
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        # the second response comes from cache_page without rendering
+        self.assertIsNotNone(responses[0].context)
+        self.assertIsNone(responses[1].context)
+        self.assertIn('no-store', responses[1]['Cache-Control'])
+        events = Event.objects.filter(kind=Event.VIEW)
+        self.assertEqual(list(events.values_list('course', 'module', 'user')),
+                         [(self.course.id, self.module.id, self.student.pk)] * 2)
+
+
+class AggregateTest(AnalyticsTestCase):
+
+    def test_events_are_rolled_up_once(self):
+        self.course.students.add(self.student)
+        self.log_views(3)
+        self.aggregate('--batch-size', '2')
+        self.assertEqual(sorted(self.activity(), key=lambda row: row[0] or 0),
+                         [(None, 1, 0), (self.module.id, 0, 3)])
+        self.log_views(2)
+        self.aggregate()
+        self.assertIn((self.module.id, 0, 5), self.activity())
+        self.assertEqual(Watermark.objects.get(name=WATERMARK).last_event_id, Event.objects.latest('id').id)
+
+    def test_recent_events_are_left_for_the_next_run(self):
+        self.log_views(2, age=timedelta(seconds=5))
+        self.aggregate('--lag', '60')
+        self.assertEqual(self.activity(), [])
+        self.aggregate('--lag', '0')
+        self.assertEqual(self.activity(), [(self.module.id, 0, 2)])
+
+    def test_delete_processed(self):
+        self.log_views(2)
+        self.aggregate('--delete-processed')
+        self.assertFalse(Event.objects.exists())
+        self.assertEqual(self.activity(), [(self.module.id, 0, 2)])
+
+    def test_range_moved_by_another_run_is_not_claimed(self):
+        Watermark.objects.create(name=WATERMARK, last_event_id=10)
+        command = AggregateCommand()
+        self.assertFalse(command.claim(0, 20))
+        self.assertTrue(command.claim(10, 20))
+        self.assertEqual(Watermark.objects.get(name=WATERMARK).last_event_id, 20)
+
+
+class ProgressExportTest(AnalyticsTestCase):
+
+    def test_progress_outlives_the_processed_events(self):
+        other = Module.objects.create(course=self.course, title='G major')
+        Module.objects.create(course=self.course, title='D major')
+        self.course.students.add(self.student, self.teacher)
+        self.log_views(2)
+        self.aggregate('--delete-processed')
+        self.log_views(1, module=other)
+        self.aggregate('--delete-processed')
+        self.assertFalse(Event.objects.exists())
+        self.assertEqual(list(export_lines('progress', 'csv', self.course)),
+                         ['id,username,modules_viewed,total_modules\r\n',
+                          '{},teacher,0,3\r\n'.format(self.teacher.id),
+                          '{},student,2,3\r\n'.format(self.student.id)])
+
+
+class ManageCourseListTest(AnalyticsTestCase):
+
+    def test_totals_are_summed_from_activity(self):
+        today = timezone.now().date()
+        CourseActivity.objects.create(course=self.course, day=today, enrollments=2, views=4)
+        CourseActivity.objects.create(course=self.course, module=self.module, day=today, views=3)
+        CourseActivity.objects.create(course=self.course, day=today - timedelta(days=1), enrollments=1)
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('manage_course_list'))
+        [course] = response.context['object_list']
+        self.assertEqual((course.total_enrollments, course.total_views), (3, 7))
+
+
+class RankingTest(AnalyticsTestCase):
+
+    def test_courses_are_ranked_by_recent_views(self):
+        today = timezone.now().date()
+        quiet = Course.objects.create(owner=self.teacher, track=self.course.track, title='Chords',
+                                      slug='chords', overview='Triads')
+        Course.objects.create(owner=self.teacher, track=self.course.track, title='Rhythm',
+                              slug='rhythm', overview='Counting')
+        # the chords course was busy a month ago, the scales course this week
+        CourseActivity.objects.create(course=quiet, day=today - timedelta(days=30), views=100)
+        CourseActivity.objects.create(course=self.course, day=today - timedelta(days=2), views=5)
+        CourseActivity.objects.create(course=self.course, module=self.module, day=today, views=2)
+        self.assertEqual([(course.slug, course.traffic) for course in popular_courses(days=7)],
+                         [('scales', 7), ('rhythm', 0), ('chords', 0)])
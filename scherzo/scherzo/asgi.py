@@ -0,0 +1,191 @@
+"""
+ASGI config for scherzo project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+to be served by an ASGI server such as uvicorn or daphne:
+
+    uvicorn scherzo.asgi:application --workers 4
+
+Django 1.10 only speaks WSGI, so each request runs the regular Django
+handler on a thread pool while the event loop reads request bodies and
+writes responses. A request waiting on memcached, the database or a
+file only holds one of the SCHERZO_ASGI_THREADS threads rather than a
+whole worker process, and slow clients hold no thread at all.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scherzo.settings")
+
+wsgi_application = get_wsgi_application()
+
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('SCHERZO_ASGI_THREADS', 64)))
+
+# request bodies larger than this are spooled to disk
+MAX_MEMORY_BODY = 2621440
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/{}'.format(scope.get('http_version', '1.1')),
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        if name in environ:
+            value = environ[name] + ',' + value
+        environ[name] = value
+    return environ
+
+
+# number of response messages the handler thread may run ahead of the
+# client before it waits
+MAX_PENDING_MESSAGES = 8
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def run_wsgi(environ, put):
+    """Run the Django handler and hand its output to put(). Runs in one
+    executor thread from start to end, so the per-thread database
+    connections are opened and closed by the same request."""
+    def start_response(status, headers, exc_info=None):
+        put(('start', int(status.split(' ', 1)[0]),
+             [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]))
+
+    result = wsgi_application(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                put(('body', chunk))
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+
+async def read_body(receive):
+    body = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            body.close()
+            raise ClientDisconnected()
+        body.write(message.get('body', b''))
+        more_body = message.get('more_body', False)
+    body.seek(0)
+    return body
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def lifespan(receive, send):
+    loop = asyncio.get_event_loop()
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # wait for the running requests without blocking the loop
+            await loop.run_in_executor(None, executor.shutdown)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        raise ValueError('Unsupported ASGI scope type {}'.format(scope['type']))
+
+    loop = asyncio.get_event_loop()
+    queue = asyncio.Queue()
+    # the handler thread takes a slot for every message and the loop
+    # frees it once the message is sent, so slow clients make the thread
+    # wait instead of buffering a whole streamed response
+    slots = threading.Semaphore(MAX_PENDING_MESSAGES)
+    # set once nobody reads the response anymore; the handler thread
+    # then stops at its next message and closes the response
+    stopped = threading.Event()
+
+    def put(message):
+        while not slots.acquire(timeout=0.5):
+            if stopped.is_set():
+                raise ClientDisconnected()
+        if stopped.is_set():
+            raise ClientDisconnected()
+        loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    try:
+        body = await read_body(receive)
+    except ClientDisconnected:
+        return
+    handler = loop.run_in_executor(executor, run_wsgi, build_environ(scope, body), put)
+    # the handler may still fail after the client is gone
+    handler.add_done_callback(lambda future: future.cancelled() or future.exception())
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    started = False
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait([getter, handler, disconnect], return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                if disconnect.done():
+                    return
+                if queue.empty():
+                    break
+                message = queue.get_nowait()
+            else:
+                message = getter.result()
+            if message[0] == 'start':
+                started = True
+                await send({'type': 'http.response.start', 'status': message[1], 'headers': message[2]})
+            else:
+                await send({'type': 'http.response.body', 'body': message[1], 'more_body': True})
+            slots.release()
+
+        if handler.exception() is not None:
+            if started:
+                raise handler.exception()
+            await send({'type': 'http.response.start', 'status': 500,
+                        'headers': [(b'content-type', b'text/plain')]})
+            await send({'type': 'http.response.body', 'body': b'Internal Server Error'})
+            return
+        if not started:
+            await send({'type': 'http.response.start', 'status': 500, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        stopped.set()
+        disconnect.cancel()
+        body.close()
@@ -0,0 +1,132 @@
+import asyncio
+import io
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from . import asgi
+
+
+class Response:
+    """WSGI response iterable recording whether it was closed"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed.set()
+
+
+def endless():
+    while True:
+        yield b'la'
+
+
+class ASGITest(SimpleTestCase):
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/course/', 'query_string': b'page=2',
+             'headers': [(b'content-type', b'text/plain'), (b'accept', b'text/html'),
+                         (b'accept', b'*/*')],
+             'client': ('10.0.0.1', 5000), 'server': ('scherzo.example.com', 8000)}
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.sent = []
+        self.disconnected = asyncio.Event(loop=self.loop)
+
+    def app(self, response):
+        def wsgi_application(environ, start_response):
+            self.environ = environ
+            self.body = environ['wsgi.input'].read()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return response
+        return wsgi_application
+
+    def serve(self, wsgi_application, send=None):
+        messages = [{'type': 'http.request', 'body': b'C D ', 'more_body': True},
+                    {'type': 'http.request', 'body': b'E F'}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await self.disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def record(message):
+            self.sent.append(message)
+
+        with mock.patch.object(asgi, 'wsgi_application', wsgi_application):
+            run = asgi.application(self.scope, receive, send or record)
+            self.loop.run_until_complete(asyncio.wait_for(run, 5, loop=self.loop))
+
+    def test_build_environ(self):
+        body = io.BytesIO()
+        environ = asgi.build_environ(self.scope, body)
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(environ['PATH_INFO'], '/course/')
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual((environ['SERVER_NAME'], environ['SERVER_PORT']), ('scherzo.example.com', '8000'))
+        self.assertEqual(environ['REMOTE_ADDR'], '10.0.0.1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertIs(environ['wsgi.input'], body)
+
+    def test_streaming(self):
+        response = Response([b'do ', b'', b're ', b'mi'])
+        self.serve(self.app(response))
+        self.assertEqual(self.body, b'C D E F')
+        self.assertEqual(self.sent[0], {'type': 'http.response.start', 'status': 200,
+                                        'headers': [(b'content-type', b'text/plain')]})
+        self.assertEqual([message['body'] for message in self.sent[1:]], [b'do ', b're ', b'mi', b''])
+        self.assertFalse(self.sent[-1].get('more_body'))
+        self.assertTrue(response.closed.is_set())
+
+    def test_error_before_start(self):
+        def wsgi_application(environ, start_response):
+            raise RuntimeError('broken')
+
+        self.serve(wsgi_application)
+        self.assertEqual([message.get('status') for message in self.sent], [500, None])
+        self.assertEqual(self.sent[1]['body'], b'Internal Server Error')
+
+    def test_disconnect_stops_the_handler(self):
+        response = Response(endless())
+
+        async def send(message):
+            self.sent.append(message)
+            if len(self.sent) == 3:
+                self.disconnected.set()
+
+        self.serve(self.app(response), send)
+        self.assertTrue(response.closed.wait(5))
+
+    def test_send_error_stops_the_handler(self):
+        response = Response(endless())
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise OSError('connection reset')
+
+        with self.assertRaises(OSError):
+            self.serve(self.app(response), send)
+        self.assertTrue(response.closed.wait(5))
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            self.sent.append(message['type'])
+
+        with mock.patch.object(asgi, 'executor', mock.Mock()) as executor:
+            self.loop.run_until_complete(asgi.application({'type': 'lifespan'}, receive, send))
+        executor.shutdown.assert_called_once_with()
+        self.assertEqual(self.sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
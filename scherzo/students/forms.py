@@ -1,6 +1,6 @@
 from django import forms
-from tracks.models import Track
+from tracks.models import Course
 
 
 class CourseEnrollForm(forms.Form):
-	course = forms.ModelChoiceField(queryset=Track.objects.all(), widget=forms.HiddenInput)
\ No newline at end of file
+	course = forms.ModelChoiceField(queryset=Course.objects.all(), widget=forms.HiddenInput)
\ No newline at end of file
@@ -1,3 +1,48 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from tracks.models import Track, Course, Module, Content, Text
+from tracks.query_audit import QueryPlanAuditMixin
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryPlanTest(QueryPlanAuditMixin, TestCase):
+    """Every view in students/urls.py must be served from indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        teacher = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'secret')
+        track = Track.objects.create(title='Grade 1', slug='grade-1')
+        cls.course = Course.objects.create(owner=teacher, track=track, title='Scales',
+                                           slug='scales', overview='Major and minor scales')
+        cls.course.students.add(cls.student)
+        cls.module = Module.objects.create(course=cls.course, title='C major')
+        text = Text.objects.create(owner=teacher, title='Fingering', content='1 2 3 1 2 3 4 5')
+        Content.objects.create(module=cls.module, item=text)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.student)
+
+    def test_student_registration(self):
+        self.client.logout()
+        self.assertIndexedQueries('get', reverse('student_registration'))
+
+    def test_student_enroll_course(self):
+        self.assertIndexedQueries('post', reverse('student_enroll_course'), {'course': self.course.id})
+
+    def test_student_course_list(self):
+        # sorting by Course.created after joining through the enrollments
+        self.assertIndexedQueries('get', reverse('student_course_list'), allow_sort=True)
+
+    def test_student_course_detail(self):
+        self.assertIndexedQueries('get', reverse('student_course_detail', args=[self.course.id]))
+
+    def test_student_course_detail_module(self):
+        self.assertIndexedQueries('get', reverse('student_course_detail_module',
+                                                 args=[self.course.id, self.module.id]))
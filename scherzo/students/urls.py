@@ -1,11 +1,12 @@
 from django.views.decorators.cache import cache_page
 from django.conf.urls import url
+from analytics.decorators import record_course_view
 from . import views
 
 urlpatterns = [
     url(r'^register/$', views.StudentRegistrationView.as_view(), name='student_registration'),
     url(r'^enroll-course/$', views.StudentEnrollCourseView.as_view(), name='student_enroll_course'),
     url(r'^courses/$', views.StudentCourseListView.as_view(), name='student_course_list'),
-    url(r'^course/(?P<pk>\d+)/$', cache_page(60 * 15)(views.StudentCourseDetailView.as_view()), name='student_course_detail'),
-    url(r'^course/(?P<pk>\d+)/(?P<module_id>\d+)/$', cache_page(60 * 15)(views.StudentCourseDetailView.as_view()), name='student_course_detail_module'),
+    url(r'^course/(?P<pk>\d+)/$', record_course_view(cache_page(60 * 15)(views.StudentCourseDetailView.as_view())), name='student_course_detail'),
+    url(r'^course/(?P<pk>\d+)/(?P<module_id>\d+)/$', record_course_view(cache_page(60 * 15)(views.StudentCourseDetailView.as_view())), name='student_course_detail_module'),
 ]
\ No newline at end of file
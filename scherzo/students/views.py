@@ -60,7 +60,7 @@ class StudentCourseDetailView(DetailView):
         context = super().get_context_data(**kwargs)
 
         # get course object
-        course = self.get_object()
+        course = self.object
         if 'module_id' in self.kwargs:
             # get current module
             context['module'] = course.modules.get(id=self.kwargs['module_id'])
@@ -1,5 +1,82 @@
 from django.contrib import admin
-from .models import Track, Course, Module
+from django.core.paginator import Paginator, InvalidPage
+from django.db import connections
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+from django.utils.functional import cached_property
+from .models import Track, Course, Module, Content, Text, File, Image, Video
+
+
+class EstimatedCountPaginator(Paginator):
+	"""Use the planner's row estimate for the unfiltered changelist of a
+	big table on PostgreSQL, where COUNT(*) has to read every row."""
+	estimate_threshold = 10000
+
+	@cached_property
+	def count(self):
+		qs = self.object_list
+		if isinstance(qs, QuerySet) and not qs.query.where:
+			connection = connections[qs.db]
+			if connection.vendor == 'postgresql':
+				with connection.cursor() as cursor:
+					cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [qs.model._meta.db_table])
+					row = cursor.fetchone()
+				if row and row[0] >= self.estimate_threshold:
+					return int(row[0])
+		return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+	"""Changelist that loads in constant time however big the table is.
+	Searches match the start of the search_fields, ignoring case, so they
+	are answered from an index instead of scanning for a substring. On
+	PostgreSQL that is the UPPER() expression index added by migration
+	0010; SQLite's LIKE is case-insensitive already."""
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+
+	def get_search_results(self, request, queryset, search_term):
+		search_term = search_term.strip()
+		if not search_term:
+			return queryset, False
+		query = Q()
+		for field in self.search_fields:
+			query |= Q(**{'{}__istartswith'.format(field): search_term})
+		return queryset.filter(query), False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+	"""Only build forms for one page of the related objects. The page
+	comes from the query string, which the change form posts back to, so
+	a save only touches the objects of the page shown."""
+	per_page = 50
+	page_param = 'page'
+	page = 1
+	query = QueryDict()
+
+	def page_url(self, number):
+		"""Query string of the page, keeping the other parameters"""
+		query = self.query.copy()
+		query[self.page_param] = number
+		return '?' + query.urlencode()
+
+	def previous_page_url(self):
+		return self.page_url(self.page_obj.previous_page_number())
+
+	def next_page_url(self):
+		return self.page_url(self.page_obj.next_page_number())
+
+	def get_queryset(self):
+		if not hasattr(self, 'page_obj'):
+			paginator = Paginator(super().get_queryset(), self.per_page)
+			try:
+				self.page_obj = paginator.page(self.page)
+			except InvalidPage:
+				self.page_obj = paginator.page(1)
+		return self.page_obj.object_list
+
 
 @admin.register(Track)
 class TrackAdmin(admin.ModelAdmin):
@@ -7,16 +84,51 @@ class TrackAdmin(admin.ModelAdmin):
 	prepopulated_fields = {'slug': ('title',)}
 
 
-class ModuleInline(admin.StackedInline):
+class ModuleInline(admin.TabularInline):
 	model = Module
+	formset = PaginatedInlineFormSet
+	fields = ['title', 'order']
+	extra = 1
+	show_change_link = True
+	template = 'admin/tracks/paginated_tabular.html'
+
+	def get_formset(self, request, obj=None, **kwargs):
+		FormSet = super().get_formset(request, obj, **kwargs)
+		FormSet.page_param = 'module_page'
+		FormSet.page = request.GET.get(FormSet.page_param, 1)
+		FormSet.query = request.GET
+		return FormSet
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(LargeTableAdmin):
 	list_display = ['title', 'track', 'created']
 	list_filter = ['created', 'track']
+	list_select_related = ['track']
+	raw_id_fields = ['owner', 'track']
 	prepopulated_fields = {'slug': ('title',)}
-	search_filter = ['title', 'overview']
+	search_fields = ['title', 'slug']
 	inlines = [ModuleInline]
 
 
+@admin.register(Module)
+class ModuleAdmin(LargeTableAdmin):
+	list_display = ['title', 'course', 'order']
+	list_select_related = ['course']
+	raw_id_fields = ['course']
+	search_fields = ['title']
+
+
+@admin.register(Content)
+class ContentAdmin(LargeTableAdmin):
+	list_display = ['id', 'module', 'content_type', 'object_id', 'order']
+	list_select_related = ['module', 'content_type']
+	raw_id_fields = ['module']
+
+
+@admin.register(Text, File, Image, Video)
+class ItemAdmin(LargeTableAdmin):
+	list_display = ['title', 'owner', 'created', 'updated']
+	list_select_related = ['owner']
+	raw_id_fields = ['owner']
+	search_fields = ['title']
@@ -0,0 +1,98 @@
+"""
+CSV and JSON lines exports of the course catalog and of the students
+enrolled in a course. Other apps add their reports with
+register_report(); analytics adds the progress report.
+
+Rows are read as plain value tuples, a fixed number at a time, in
+primary key order, so the memory used doesn't grow with the size of a
+class. The output is produced line by line for a StreamingHttpResponse
+or a file.
+"""
+
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Course
+
+
+CHUNK_SIZE = 1000
+
+CONTENT_TYPES = {
+	'csv': 'text/csv',
+	'jsonl': 'application/x-ndjson',
+}
+
+
+def chunks(queryset, fields, chunk_size=CHUNK_SIZE):
+	"""Yield lists of at most chunk_size value tuples of the given fields.
+	Each chunk starts after the last primary key of the previous one."""
+	last_pk = None
+	while True:
+		qs = queryset.order_by('pk')
+		if last_pk is not None:
+			qs = qs.filter(pk__gt=last_pk)
+		rows = list(qs.values_list('pk', *fields)[:chunk_size].iterator())
+		if not rows:
+			return
+		last_pk = rows[-1][0]
+		yield [row[1:] for row in rows]
+		if len(rows) < chunk_size:
+			return
+
+
+def rows(queryset, fields, chunk_size=CHUNK_SIZE):
+	for chunk in chunks(queryset, fields, chunk_size):
+		yield from chunk
+
+
+CATALOG_FIELDS = ('id', 'slug', 'title', 'track__title', 'owner__username', 'created')
+ROSTER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email')
+
+
+def catalog_rows(course=None):
+	return rows(Course.objects.all(), CATALOG_FIELDS)
+
+
+def roster_rows(course):
+	return rows(User.objects.filter(courses_enrolled=course), ROSTER_FIELDS)
+
+
+REPORTS = {
+	'catalog': (CATALOG_FIELDS, catalog_rows),
+	'roster': (ROSTER_FIELDS, roster_rows),
+}
+
+
+def register_report(name, header, get_rows):
+	"""Add a report; get_rows(course) returns an iterable of row tuples
+	matching header"""
+	REPORTS[name] = (header, get_rows)
+
+
+class Echo:
+	"""File-like object that hands back what csv.writer writes"""
+	def write(self, value):
+		return value
+
+
+def csv_lines(header, rows):
+	writer = csv.writer(Echo())
+	yield writer.writerow(header)
+	for row in rows:
+		yield writer.writerow(row)
+
+
+def jsonl_lines(header, rows):
+	for row in rows:
+		yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def export_lines(report, format, course=None):
+	"""Return an iterator over the lines of the report in the given format"""
+	header, get_rows = REPORTS[report]
+	header = [field.replace('__', '_') for field in header]
+	lines = csv_lines if format == 'csv' else jsonl_lines
+	return lines(header, get_rows(course))
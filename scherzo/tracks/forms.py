@@ -1,6 +1,15 @@
+from functools import lru_cache
+
 from django import forms
-from django.forms.models import inlineformset_factory
+from django.forms.models import inlineformset_factory, modelform_factory
 from .models import Course, Module
 
 
-ModuleFormSet = inlineformset_factory(Course, Module, fields=['title', 'description'], extra=2, can_delete=True)
\ No newline at end of file
+ModuleFormSet = inlineformset_factory(Course, Module, fields=['title', 'description'], extra=2, can_delete=True)
+
+
+@lru_cache(maxsize=None)
+def content_form_class(model):
+	"""Build the ModelForm for one of the content models, excluding the
+	fields set by the view. The class is built once per process."""
+	return modelform_factory(model, exclude=['owner', 'order', 'created', 'updated'])
@@ -0,0 +1,81 @@
+"""
+Measure the throughput and latency of running servers at a given
+concurrency, to compare the WSGI and ASGI deployments:
+
+	gunicorn scherzo.wsgi --workers 4 --bind 127.0.0.1:8000
+	uvicorn scherzo.asgi:application --workers 4 --port 8001
+	python manage.py benchmark http://127.0.0.1:8000/ http://127.0.0.1:8001/ --concurrency 200
+
+Each base URL is combined with every --path, and the paths are requested
+in turn by the client threads.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+	help = 'Compare the throughput of servers under concurrent load.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('servers', nargs='+', help='Base URL of each server.')
+		parser.add_argument('--path', action='append', dest='paths',
+							help='Path to request, can be repeated. Defaults to the catalog.')
+		parser.add_argument('--concurrency', type=int, default=100)
+		parser.add_argument('--requests', type=int, default=5000,
+							help='Number of requests sent to each server.')
+		parser.add_argument('--timeout', type=float, default=30)
+
+	def handle(self, *args, **options):
+		paths = options['paths'] or ['/']
+		self.stdout.write('{:<40} {:>9} {:>8} {:>8} {:>8} {:>7}'.format(
+			'server', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'))
+		for server in options['servers']:
+			urls = [urljoin(server, path) for path in paths]
+			latencies, errors, elapsed = self.run(urls, options['requests'], options['concurrency'], options['timeout'])
+			latencies.sort()
+			self.stdout.write('{:<40} {:>9.1f} {:>8.1f} {:>8.1f} {:>8.1f} {:>7}'.format(
+				server, len(latencies) / elapsed,
+				self.percentile(latencies, 50), self.percentile(latencies, 95), self.percentile(latencies, 99),
+				errors))
+
+	def run(self, urls, total, concurrency, timeout):
+		"""Send total requests from concurrency threads, return the
+		latencies of the successful ones, the error count and the time"""
+		counter = iter(range(total))
+		lock = threading.Lock()
+		latencies, errors = [], [0]
+
+		def worker():
+			while True:
+				with lock:
+					n = next(counter, None)
+				if n is None:
+					return
+				start = time.perf_counter()
+				try:
+					with urlopen(urls[n % len(urls)], timeout=timeout) as response:
+						response.read()
+				except (HTTPError, URLError, OSError):
+					with lock:
+						errors[0] += 1
+					continue
+				with lock:
+					latencies.append(time.perf_counter() - start)
+
+		start = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=concurrency) as executor:
+			for i in range(concurrency):
+				executor.submit(worker)
+		return latencies, errors[0], time.perf_counter() - start
+
+	def percentile(self, values, percent):
+		if not values:
+			return 0
+		return values[min(len(values) - 1, int(len(values) * percent / 100))] * 1000
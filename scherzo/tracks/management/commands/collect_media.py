@@ -0,0 +1,58 @@
+"""
+Delete the stored files no content item points at, and the Content rows
+whose item was deleted.
+
+	python manage.py collect_media --dry-run
+"""
+
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tracks.models import Content, Text, File, Image, Video
+
+
+FILE_MODELS = (File, Image)
+
+
+class Command(BaseCommand):
+	help = 'Garbage-collect unreferenced media files and orphaned contents.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--dry-run', action='store_true',
+							help='Only report what would be deleted.')
+		parser.add_argument('--grace', type=int, default=60,
+							help='Skip files uploaded in the last GRACE minutes, their rows may not be saved yet.')
+
+	def handle(self, *args, **options):
+		dry_run = options['dry_run']
+
+		contents = 0
+		for model in (Text, File, Image, Video):
+			orphans = Content.objects.filter(content_type=ContentType.objects.get_for_model(model)) \
+									 .exclude(object_id__in=model.objects.values('id'))
+			contents += orphans.count() if dry_run else orphans.delete()[0]
+
+		cutoff = timezone.now() - timedelta(minutes=options['grace'])
+		files = size = 0
+		for model in FILE_MODELS:
+			prefix = model._meta.get_field('file').upload_to
+			for page in default_storage.iter_pages(prefix + '/'):
+				# one lookup on the indexed file column per page of the listing
+				names = [entry['Key'] for entry in page]
+				referenced = set(model.objects.filter(file__in=names).values_list('file', flat=True))
+				for entry in page:
+					if entry['Key'] in referenced or entry['LastModified'] > cutoff:
+						continue
+					files += 1
+					size += entry['Size']
+					if options['verbosity'] > 1:
+						self.stdout.write(entry['Key'])
+					if not dry_run:
+						default_storage.delete(entry['Key'])
+
+		action = 'Would delete' if dry_run else 'Deleted'
+		self.stdout.write('{} {} orphaned contents and {} files ({} bytes).'.format(action, contents, files, size))
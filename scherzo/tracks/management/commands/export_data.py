@@ -0,0 +1,40 @@
+"""
+Write the course catalog, or the roster or progress report of a course,
+to a file or to standard output.
+
+	python manage.py export_data roster --course 12 --format jsonl --output roster.jsonl
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracks.exports import REPORTS, CONTENT_TYPES, export_lines
+from tracks.models import Course
+
+
+class Command(BaseCommand):
+	help = 'Export the course catalog, a course roster or student progress.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('report', choices=sorted(REPORTS))
+		parser.add_argument('--course', type=int,
+							help='Id of the course, required for roster and progress.')
+		parser.add_argument('--format', choices=sorted(CONTENT_TYPES), default='csv')
+		parser.add_argument('--output', help='File to write to instead of standard output.')
+
+	def handle(self, *args, **options):
+		course = None
+		if options['report'] != 'catalog':
+			if options['course'] is None:
+				raise CommandError('--course is required for the {} report.'.format(options['report']))
+			try:
+				course = Course.objects.get(id=options['course'])
+			except Course.DoesNotExist:
+				raise CommandError('Course {} does not exist.'.format(options['course']))
+
+		lines = export_lines(options['report'], options['format'], course)
+		if options['output']:
+			with open(options['output'], 'w', newline='') as output:
+				output.writelines(lines)
+		else:
+			for line in lines:
+				self.stdout.write(line, ending='')
@@ -0,0 +1,69 @@
+"""
+Report where a fresh worker spends its startup time.
+
+Starts a new interpreter with -X importtime, sets Django up and loads the
+URL configuration the way a worker does before its first request, then
+lists the slowest imports.
+
+	python manage.py import_report --top 30
+"""
+
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+STARTUP = (
+	'import django; django.setup(); '
+	'from django.core.urlresolvers import get_resolver; '
+	'get_resolver().url_patterns'
+)
+
+
+class Command(BaseCommand):
+	help = 'List the slowest imports made while a worker starts.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--top', type=int, default=20,
+							help='Number of imports to list.')
+		parser.add_argument('--self', action='store_true', dest='self_time',
+							help='Sort by time spent in the module itself instead of cumulative time.')
+
+	def handle(self, *args, **options):
+		if sys.version_info < (3, 7):
+			raise CommandError('-X importtime needs Python 3.7 or newer.')
+		env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'scherzo.settings'))
+		process = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP],
+								 stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+								 env=env, cwd=settings.BASE_DIR, universal_newlines=True)
+		if process.returncode:
+			raise CommandError('Startup failed:\n{}'.format(process.stderr))
+
+		imports = self.parse(process.stderr)
+		total = sum(own for own, cumulative, name in imports)
+		column = 0 if options['self_time'] else 1
+		imports.sort(key=lambda row: row[column], reverse=True)
+
+		self.stdout.write('{:>10} {:>12}  module'.format('self ms', 'cumulative'))
+		for own, cumulative, name in imports[:options['top']]:
+			self.stdout.write('{:>10.1f} {:>12.1f}  {}'.format(own / 1000, cumulative / 1000, name))
+		self.stdout.write('{} modules imported in {:.1f} ms'.format(len(imports), total / 1000))
+
+	def parse(self, output):
+		"""Return (self us, cumulative us, module) for every line of
+		-X importtime output"""
+		imports = []
+		for line in output.splitlines():
+			if not line.startswith('import time:'):
+				continue
+			fields = line[len('import time:'):].split('|')
+			try:
+				own, cumulative = int(fields[0]), int(fields[1])
+			except (IndexError, ValueError):
+				# the header line
+				continue
+			imports.append((own, cumulative, fields[2].strip()))
+		return imports
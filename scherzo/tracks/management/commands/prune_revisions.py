@@ -0,0 +1,29 @@
+"""
+Delete old content revisions.  Meant to run on a schedule from cron.
+
+	python manage.py prune_revisions --keep 20 --days 90
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tracks.versioning import prune_revisions
+
+
+class Command(BaseCommand):
+	help = 'Delete old revisions of the content items.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--keep', type=int, default=20,
+							help='Number of latest revisions always kept for each item.')
+		parser.add_argument('--days', type=int, default=None,
+							help='Also keep every revision from the last DAYS days.')
+
+	def handle(self, *args, **options):
+		before = None
+		if options['days'] is not None:
+			before = timezone.now() - timedelta(days=options['days'])
+		deleted = prune_revisions(options['keep'], before)
+		self.stdout.write('Deleted {} revisions.'.format(deleted))
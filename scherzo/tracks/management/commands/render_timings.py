@@ -0,0 +1,29 @@
+"""
+Show how much time the workers spent rendering each content template.
+
+	python manage.py render_timings
+	python manage.py render_timings --reset
+"""
+
+from django.core.management.base import BaseCommand
+
+from tracks.rendering import timing_stats, reset_timings
+
+
+class Command(BaseCommand):
+	help = 'Report the render time of the content templates.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--reset', action='store_true',
+							help='Clear the timings after reporting them.')
+
+	def handle(self, *args, **options):
+		rows = timing_stats()
+		if not rows:
+			self.stdout.write('No content rendered yet.')
+		else:
+			self.stdout.write('{:<32} {:>9} {:>12} {:>9}'.format('template', 'renders', 'total ms', 'mean ms'))
+			for name, count, total, mean in rows:
+				self.stdout.write('{:<32} {:>9} {:>12.1f} {:>9.3f}'.format(name, count, total, mean))
+		if options['reset']:
+			reset_timings()
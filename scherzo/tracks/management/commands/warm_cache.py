@@ -0,0 +1,101 @@
+"""
+Pre-render the public catalog and the lesson fragments so the first
+visitors after a deploy or a memcached restart don't pay the full
+render cost.
+
+Pages are requested through the test client so they go through the
+same cache middleware a real visitor would, while the module contents
+fragment is rendered directly from its template.  The pages are cached
+as an anonymous visitor sees them; pages that depend on the session
+vary on the cookie, so logged-in users never get them.  Courses are
+ranked by their traffic over the last --days days, see ranking.py, and
+fetched in parallel worker threads.
+
+	python manage.py warm_cache --concurrency 8 --days 7 --host scherzo.example.com
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.template.loader import render_to_string
+from django.test import Client
+
+from tracks.models import Track, Module
+from tracks.ranking import popular_courses
+
+
+class Command(BaseCommand):
+	help = 'Populate the cache with the course catalog and module contents.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--concurrency', type=int, default=4,
+							help='Number of worker threads rendering pages.')
+		parser.add_argument('--limit', type=int, default=None,
+							help='Only warm the N most popular courses.')
+		parser.add_argument('--days', type=int, default=7,
+							help='Rank courses by their traffic over the last DAYS days.')
+		parser.add_argument('--host', default='localhost',
+							help='Host name the pages are cached under.')
+
+	def handle(self, *args, **options):
+		self.host = options['host']
+		tasks = self.get_tasks(options['limit'], options['days'])
+		warmed = failed = 0
+		with ThreadPoolExecutor(max_workers=max(options['concurrency'], 1)) as executor:
+			futures = {executor.submit(self.run_task, task): task for task in tasks}
+			for future in as_completed(futures):
+				kind, target = futures[future]
+				try:
+					future.result()
+				except Exception as e:
+					failed += 1
+					self.stderr.write('Failed to warm {} {}: {}'.format(kind, target, e))
+				else:
+					warmed += 1
+					if options['verbosity'] > 1:
+						self.stdout.write('Warmed {} {}'.format(kind, target))
+		self.stdout.write('Warmed {} entries, {} failed.'.format(warmed, failed))
+
+	def get_tasks(self, limit=None, days=7):
+		"""Return (kind, target) pairs, most visited first.
+		The catalog index comes first, then the track lists ordered by
+		the recent traffic of their courses, then each course detail page
+		followed by its modules.
+		"""
+		courses = popular_courses(days)
+		if limit:
+			courses = courses[:limit]
+		courses = list(courses)
+
+		track_traffic = {}
+		for course in courses:
+			track_traffic[course.track_id] = track_traffic.get(course.track_id, 0) + course.traffic
+		tracks = Track.objects.filter(id__in=track_traffic)
+		tracks = sorted(tracks, key=lambda t: track_traffic[t.id], reverse=True)
+
+		modules = {}
+		for module in Module.objects.filter(course__in=courses):
+			modules.setdefault(module.course_id, []).append(module)
+
+		tasks = [('page', reverse('course_list'))]
+		tasks += [('page', reverse('course_list_track', args=[track.slug])) for track in tracks]
+		for course in courses:
+			tasks.append(('page', reverse('course_detail', args=[course.slug])))
+			tasks += [('module', module) for module in modules.get(course.id, [])]
+		return tasks
+
+	def run_task(self, task):
+		kind, target = task
+		try:
+			if kind == 'page':
+				response = Client(HTTP_HOST=self.host).get(target)
+				if response.status_code != 200:
+					raise ValueError('status {}'.format(response.status_code))
+			else:
+				# the {% cache %} tag stores the fragment as a side effect
+				render_to_string('students/course/module_contents.html', {'module': target})
+		finally:
+			# every worker thread opens its own connection
+			connections.close_all()
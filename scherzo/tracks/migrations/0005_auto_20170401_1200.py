@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-04-01 12:00
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracks', '0004_course_students'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='students',
+            field=models.ManyToManyField(blank=True, related_name='courses_enrolled', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterIndexTogether(
+            name='content',
+            index_together=set([('module', 'order')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='course',
+            index_together=set([('track', 'created'), ('owner', 'created')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='module',
+            index_together=set([('course', 'order')]),
+        ),
+    ]
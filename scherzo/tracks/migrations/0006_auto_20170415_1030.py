@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-04-15 10:30
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0005_auto_20170401_1200'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='file',
+            name='title',
+            field=models.CharField(db_index=True, max_length=250),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='title',
+            field=models.CharField(db_index=True, max_length=250),
+        ),
+        migrations.AlterField(
+            model_name='module',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='text',
+            name='title',
+            field=models.CharField(db_index=True, max_length=250),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='title',
+            field=models.CharField(db_index=True, max_length=250),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-04-29 11:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0007_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='file',
+            name='file',
+            field=models.FileField(db_index=True, upload_to='files'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='file',
+            field=models.FileField(db_index=True, upload_to='images'),
+        ),
+    ]
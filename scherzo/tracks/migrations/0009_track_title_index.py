@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2026-10-19 07:04
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0008_auto_20170429_1140'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='track',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
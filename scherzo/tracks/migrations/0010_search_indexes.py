@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# istartswith compares UPPER(column::text) on PostgreSQL, so the admin
+# searches need expression indexes to be answered from an index
+SEARCH_COLUMNS = [
+    ('tracks_course', 'title'),
+    ('tracks_course', 'slug'),
+    ('tracks_module', 'title'),
+    ('tracks_text', 'title'),
+    ('tracks_file', 'title'),
+    ('tracks_image', 'title'),
+    ('tracks_video', 'title'),
+]
+
+
+def index_name(table, column):
+    return '{}_{}_upper_like'.format(table, column)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute('CREATE INDEX {} ON {} (UPPER({}::text) text_pattern_ops)'.format(
+            index_name(table, column), table, column))
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute('DROP INDEX IF EXISTS {}'.format(index_name(table, column)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0009_track_title_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -15,18 +15,18 @@ providing a high-level, generic interface for working with the models.
 
 from django.db import models
 from django.contrib.auth.models import User
-from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from .fields import OrderField
+from .rendering import content_renderer
 
 
 class Track(models.Model):
 	"""Created in the admin panel.
 	These are constants a teacher would not have access to."""
-	title = models.CharField(max_length=200)
+	title = models.CharField(max_length=200, db_index=True)
 	slug = models.SlugField(max_length=200, unique=True)
 
 	class Meta:
@@ -50,13 +50,14 @@ class Course(models.Model):
 	students = models.ManyToManyField(User, related_name='courses_enrolled', blank=True)
 	owner = models.ForeignKey(User, related_name='courses_created')
 	track = models.ForeignKey(Track, related_name='courses')
-	title = models.CharField(max_length=200)
+	title = models.CharField(max_length=200, db_index=True)
 	slug = models.SlugField(max_length=200, unique=True)
 	overview = models.TextField()
-	created = models.DateTimeField(auto_now_add=True)
+	created = models.DateTimeField(auto_now_add=True, db_index=True)
 
 	class Meta:
 		ordering = ('-created',)
+		index_together = [['track', 'created'], ['owner', 'created']]
 
 	def __str__(self):
 		return self.title
@@ -66,12 +67,13 @@ class Module(models.Model):
 	"""Each course is comprised of several modules which
 	are tailored uniquely by the teacher."""
 	course = models.ForeignKey(Course, related_name='modules')
-	title = models.CharField(max_length=200)
+	title = models.CharField(max_length=200, db_index=True)
 	description = models.TextField(blank=True)
 	order = OrderField(blank=True, for_fields=['course'])
 
 	class Meta:
 		ordering = ['order']
+		index_together = [['course', 'order']]
 
 	def __str__(self):
 		return '{}. {}'.format(self.order, self.title)
@@ -100,6 +102,7 @@ class Content(models.Model):
 
 	class Meta:
 		ordering = ['order']
+		index_together = [['module', 'order']]
 
 
 class ItemBase(models.Model):
@@ -109,7 +112,7 @@ class ItemBase(models.Model):
 	Text, File, Image, and Video
 	"""
 	owner = models.ForeignKey(User, related_name='%(class)s_related')
-	title = models.CharField(max_length=250)
+	title = models.CharField(max_length=250, db_index=True)
 	created = models.DateTimeField(auto_now_add=True)
 	updated = models.DateTimeField(auto_now=True)
 
@@ -117,7 +120,7 @@ class ItemBase(models.Model):
 		abstract = True
 
 	def render(self):
-		return render_to_string('courses/content/{}.html'.format(self._meta.model_name), {'item': self})
+		return content_renderer.render(self)
 
 	def __str__(self):
 		return self.title
@@ -128,12 +131,35 @@ class Text(ItemBase):
 
 
 class File(ItemBase):
-	file = models.FileField(upload_to='files')
+	file = models.FileField(upload_to='files', db_index=True)
 
 
 class Image(ItemBase):
-	file = models.FileField(upload_to='images')
+	file = models.FileField(upload_to='images', db_index=True)
 
 
 class Video(ItemBase):
-	url = models.URLField()
\ No newline at end of file
+	url = models.URLField()
+
+
+class Revision(models.Model):
+	"""A saved state of a content item.
+
+	Snapshots store every versioned field, the other revisions store a
+	compressed delta against the revision before them. See versioning.py.
+	"""
+	content_type = models.ForeignKey(ContentType)
+	object_id = models.PositiveIntegerField()
+	item = GenericForeignKey('content_type', 'object_id')
+	number = models.PositiveIntegerField()
+	snapshot = models.BooleanField(default=False)
+	data = models.BinaryField()
+	author = models.ForeignKey(User, related_name='revisions', null=True, blank=True)
+	created = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		ordering = ['number']
+		unique_together = ('content_type', 'object_id', 'number')
+
+	def __str__(self):
+		return '{} #{}'.format(self.item, self.number)
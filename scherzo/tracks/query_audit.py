@@ -0,0 +1,108 @@
+"""
+Test helpers that capture the query plan of every query a view issues
+and fail when one of them reads a whole table or sorts in a temporary
+B-tree instead of walking an index.
+
+Supports SQLite (EXPLAIN QUERY PLAN) and PostgreSQL (EXPLAIN with
+sequential scans disabled, so tiny test tables still show whether an
+index could be used).
+"""
+
+import re
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+AUDITED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!SUBQUERY|CONSTANT)(\w+)')
+SQLITE_SORT = re.compile(r'USE TEMP B-TREE')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+POSTGRES_SORT = re.compile(r'^\s*(?:->\s*)?Sort\b')
+
+
+def explain(sql, params):
+	"""Return the lines of the query plan for the given statement"""
+	with connection.cursor() as cursor:
+		if connection.vendor == 'sqlite':
+			cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+			# the detail text is always the last column
+			return [row[-1] for row in cursor.fetchall()]
+		cursor.execute('SET LOCAL enable_seqscan = off')
+		cursor.execute('EXPLAIN ' + sql, params)
+		return [row[0] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, allowed_scans=(), allow_sort=False):
+	"""Return the lines of a plan that are full table scans of tables
+	not in allowed_scans, or temporary sorts unless allow_sort is set.
+	"""
+	if connection.vendor == 'sqlite':
+		scan, sort = SQLITE_SCAN, SQLITE_SORT
+	else:
+		scan, sort = POSTGRES_SCAN, POSTGRES_SORT
+	problems = []
+	for line in plan:
+		match = scan.search(line)
+		if match and 'USING' not in line and match.group(1) not in allowed_scans:
+			problems.append(line)
+		elif sort.search(line) and not allow_sort:
+			problems.append(line)
+	return problems
+
+
+class QueryPlanAuditMixin:
+	"""TestCase mixin. Use assertIndexedQueries() in place of a plain
+	self.client call to check every query the request issues.
+
+	always_allowed_scans lists lookup tables that stay small and are
+	cheaper to scan than to index.
+	"""
+	always_allowed_scans = ('django_content_type', 'auth_permission', 'tracks_track')
+
+	def setUp(self):
+		super().setUp()
+		if connection.vendor not in ('sqlite', 'postgresql'):
+			self.skipTest('Query plan audit is not supported on {}'.format(connection.vendor))
+
+	def capture_statements(self, func, *args, **kwargs):
+		"""Call func and return its result plus the (sql, params) of every
+		statement it executed."""
+		statements = []
+		last_executed_query = connection.ops.last_executed_query
+
+		def record(cursor, sql, params):
+			statements.append((sql, params))
+			return last_executed_query(cursor, sql, params)
+
+		with CaptureQueriesContext(connection), \
+				mock.patch.object(connection.ops, 'last_executed_query', record):
+			result = func(*args, **kwargs)
+		return result, statements
+
+	def assertIndexedQueries(self, method, path, data=None, allowed_scans=(), allow_sort=False, **extra):
+		args = () if data is None else (data,)
+
+		def request():
+			response = getattr(self.client, method)(path, *args, **extra)
+			if response.streaming:
+				# a streamed response runs its queries while it is consumed
+				list(response.streaming_content)
+			return response
+
+		response, statements = self.capture_statements(request)
+		allowed_scans = tuple(allowed_scans) + self.always_allowed_scans
+		failures = []
+		for sql, params in statements:
+			if not sql.lstrip().upper().startswith(AUDITED_STATEMENTS):
+				continue
+			plan = explain(sql, params)
+			problems = plan_problems(plan, allowed_scans, allow_sort)
+			if problems:
+				failures.append('{}\n    {}'.format(sql, '\n    '.join(problems)))
+		if failures:
+			self.fail('{} {} issued unindexed queries:\n{}'.format(
+				method.upper(), path, '\n'.join(failures)))
+		return response
@@ -0,0 +1,31 @@
+"""
+Popularity of the courses, for the jobs that handle the most visited
+courses first.
+
+Courses are ranked by enrollment unless another app registers a better
+measure of traffic with register_ranking(); analytics ranks them by
+their recent views.
+"""
+
+from django.db.models import Count
+
+from .models import Course
+
+
+def by_enrollment(courses, days):
+	return courses.annotate(traffic=Count('students'))
+
+
+ranking = by_enrollment
+
+
+def register_ranking(annotate):
+	"""Rank courses with annotate(courses, days), which returns the
+	courses annotated with an integer traffic over the last days days"""
+	global ranking
+	ranking = annotate
+
+
+def popular_courses(days=7):
+	"""All courses, annotated with their traffic, most visited first"""
+	return ranking(Course.objects.all(), days).order_by('-traffic', '-created')
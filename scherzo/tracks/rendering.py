@@ -0,0 +1,108 @@
+"""
+Renders content items and records how long each content template takes,
+so we can see which content types dominate the cost of a lesson page.
+
+Each content template is compiled the first time an item of its model
+is rendered and kept for the life of the process, so rendering an item
+doesn't look its template up by name. Timings are added up in memory
+and added to counters in the cache at the end of every request, or
+every FLUSH_INTERVAL seconds during a long one; the render_timings
+command reads them back for all the workers together.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.dispatch import receiver
+from django.template import Context
+from django.template.loader import get_template
+
+
+CONTENT_MODELS = ('text', 'video', 'image', 'file')
+FLUSH_INTERVAL = 10
+KEY_PREFIX = 'render_timings'
+
+
+def template_name(model_name):
+	return 'courses/content/{}.html'.format(model_name)
+
+
+def timing_keys(model_name):
+	return '{}_{}_count'.format(KEY_PREFIX, model_name), '{}_{}_total'.format(KEY_PREFIX, model_name)
+
+
+class ContentRenderer:
+
+	def __init__(self):
+		self.templates = {}
+		self.pending = {}
+		self.lock = threading.Lock()
+		self.last_flush = time.monotonic()
+
+	def template(self, model_name):
+		"""Return the compiled template of the model, compiling it on first use"""
+		try:
+			return self.templates[model_name]
+		except KeyError:
+			template = get_template(template_name(model_name)).template
+			return self.templates.setdefault(model_name, template)
+
+	def render(self, item):
+		model_name = item._meta.model_name
+		template = self.template(model_name)
+		start = time.perf_counter()
+		html = template.render(Context({'item': item}, autoescape=template.engine.autoescape))
+		self.record(model_name, time.perf_counter() - start)
+		return html
+
+	def record(self, model_name, elapsed):
+		with self.lock:
+			count, total = self.pending.get(model_name, (0, 0))
+			self.pending[model_name] = (count + 1, total + int(elapsed * 1000000))
+			due = time.monotonic() - self.last_flush >= FLUSH_INTERVAL
+		if due:
+			self.flush()
+
+	def flush(self):
+		"""Add the timings recorded since the last flush to the cache"""
+		with self.lock:
+			pending, self.pending = self.pending, {}
+			self.last_flush = time.monotonic()
+		for model_name, values in pending.items():
+			for key, value in zip(timing_keys(model_name), values):
+				cache.add(key, 0, None)
+				try:
+					cache.incr(key, value)
+				except ValueError:
+					# the counter was evicted in between
+					cache.set(key, value, None)
+
+
+def timing_stats():
+	"""Return (template name, renders, total ms, mean ms) for every
+	content template rendered, most expensive first"""
+	keys = {model_name: timing_keys(model_name) for model_name in CONTENT_MODELS}
+	values = cache.get_many([key for pair in keys.values() for key in pair])
+	rows = []
+	for model_name, (count_key, total_key) in keys.items():
+		count, total = values.get(count_key, 0), values.get(total_key, 0)
+		if count:
+			rows.append((template_name(model_name), count, total / 1000, total / 1000 / count))
+	return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def reset_timings():
+	cache.delete_many([key for model_name in CONTENT_MODELS for key in timing_keys(model_name)])
+
+
+content_renderer = ContentRenderer()
+
+
+@receiver(request_finished, dispatch_uid='tracks_flush_render_timings')
+def flush_timings(sender, **kwargs):
+	"""Hand the timings of the request to the cache, so those of a worker
+	that goes idle aren't left in memory"""
+	if content_renderer.pending:
+		content_renderer.flush()
@@ -0,0 +1,237 @@
+"""
+Media storage that names every uploaded file after the SHA-256 of its
+content, sharded in two levels of directories:
+
+	files/3f/a2/3fa2...e1.pdf
+
+Identical uploads are stored once and shared by every File or Image
+row that points at them. Deleting a row never deletes its file, since
+another row may be about to point at it; the collect_media command
+removes the files no row references once they are older than a grace
+period. Saving content that is already stored refreshes its modified
+time, so the grace period also covers uploads that were deduplicated.
+
+The storage talks to its objects through a small subset of the S3
+client API; LocalObjectStore implements it on the local filesystem, so
+the same code runs against a directory in development and tests and
+against a bucket in production.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+from itertools import islice
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+
+class LocalObjectStore:
+	"""Stand-in for an S3 client keeping objects as files under location.
+	Methods and arguments follow boto3, Bucket is accepted and ignored."""
+
+	class NoSuchKey(Exception):
+		pass
+
+	def __init__(self, location):
+		self.location = os.path.abspath(location)
+
+	def path(self, key):
+		return safe_join(self.location, key)
+
+	def put_object(self, Key, Body, Bucket=None):
+		"""Write the object to a temporary file first so readers never
+		see a partial object"""
+		path = self.path(Key)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				if isinstance(Body, bytes):
+					f.write(Body)
+				elif hasattr(Body, 'chunks'):
+					for chunk in Body.chunks():
+						f.write(chunk)
+				else:
+					f.write(Body.read())
+			os.replace(tmp, path)
+		except Exception:
+			os.remove(tmp)
+			raise
+		return {}
+
+	def head_object(self, Key, Bucket=None):
+		try:
+			stat = os.stat(self.path(Key))
+		except FileNotFoundError:
+			raise self.NoSuchKey(Key)
+		return {'ContentLength': stat.st_size,
+				'LastModified': datetime.fromtimestamp(stat.st_mtime, timezone.utc)}
+
+	def get_object(self, Key, Bucket=None):
+		response = self.head_object(Key)
+		response['Body'] = open(self.path(Key), 'rb')
+		return response
+
+	def copy_object(self, Key, CopySource, MetadataDirective='COPY', Bucket=None):
+		"""Copying an object onto itself only updates its modified time,
+		as it does on S3 with MetadataDirective='REPLACE'"""
+		source = self.path(CopySource['Key'])
+		if not os.path.exists(source):
+			raise self.NoSuchKey(CopySource['Key'])
+		if CopySource['Key'] == Key:
+			os.utime(source)
+		else:
+			with open(source, 'rb') as f:
+				self.put_object(Key=Key, Body=f)
+		return {}
+
+	def delete_object(self, Key, Bucket=None):
+		try:
+			os.remove(self.path(Key))
+		except FileNotFoundError:
+			pass
+		return {}
+
+	def list_objects_v2(self, Prefix='', ContinuationToken=None, MaxKeys=1000, Bucket=None):
+		"""List the objects whose key starts with Prefix in key order,
+		MaxKeys at a time. Only the directories holding keys after the
+		continuation token are read, and only the page is stat'ed."""
+		directory = Prefix[:Prefix.rfind('/') + 1]
+		keys = list(islice(self.iter_keys(directory, Prefix, ContinuationToken or ''), MaxKeys + 1))
+		page = keys[:MaxKeys]
+		contents = []
+		for key in page:
+			head = self.head_object(key)
+			contents.append({'Key': key, 'Size': head['ContentLength'], 'LastModified': head['LastModified']})
+		response = {'Contents': contents, 'KeyCount': len(contents), 'IsTruncated': len(keys) > MaxKeys}
+		if response['IsTruncated']:
+			response['NextContinuationToken'] = page[-1]
+		return response
+
+	def iter_keys(self, directory, prefix, start_after):
+		"""Yield the keys under directory that start with prefix and sort
+		after start_after, in order. Every key under a subdirectory d
+		starts with d/, so sorting a directory's entries as name/ and
+		name and descending in that order yields the keys sorted."""
+		try:
+			with os.scandir(self.path(directory)) as scan:
+				entries = sorted((directory + entry.name + ('/' if entry.is_dir() else ''), entry.is_dir())
+								 for entry in scan)
+		except FileNotFoundError:
+			return
+		for key, is_dir in entries:
+			if is_dir:
+				if not (key.startswith(prefix) or prefix.startswith(key)):
+					continue
+				# skip the subtrees whose keys all sort before start_after
+				if key < start_after and not start_after.startswith(key):
+					continue
+				yield from self.iter_keys(key, prefix, start_after)
+			elif key.startswith(prefix) and key > start_after:
+				yield key
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+	"""Storage over an object store client. The client needs put_object,
+	get_object, head_object, copy_object, delete_object and
+	list_objects_v2, and a NoSuchKey exception raised by head_object for
+	missing keys."""
+
+	def __init__(self, client=None, bucket=None, location=None, base_url=None):
+		self.location = location or settings.MEDIA_ROOT
+		self.base_url = base_url or settings.MEDIA_URL
+		self.client = client or LocalObjectStore(self.location)
+		self.bucket = bucket
+
+	def hashed_name(self, name, content):
+		"""Return upload_to/ab/cd/abcd...ext for the content"""
+		digest = hashlib.sha256()
+		for chunk in content.chunks():
+			digest.update(chunk)
+		digest = digest.hexdigest()
+		prefix = os.path.dirname(name)
+		extension = os.path.splitext(name)[1].lower()
+		return '/'.join(part for part in (prefix, digest[:2], digest[2:4], digest + extension) if part)
+
+	def get_available_name(self, name, max_length=None):
+		# names depend on the content only, an existing name holds the same file
+		return name
+
+	def _save(self, name, content):
+		name = self.hashed_name(name, content)
+		try:
+			# keep collect_media from deleting it before the new row is saved
+			self.client.copy_object(Bucket=self.bucket, Key=name, MetadataDirective='REPLACE',
+									CopySource={'Bucket': self.bucket, 'Key': name})
+		except self.client.NoSuchKey:
+			content.seek(0)
+			self.client.put_object(Bucket=self.bucket, Key=name, Body=content)
+		return name
+
+	def _open(self, name, mode='rb'):
+		return File(self.client.get_object(Bucket=self.bucket, Key=name)['Body'], name)
+
+	def delete(self, name):
+		self.client.delete_object(Bucket=self.bucket, Key=name)
+
+	def exists(self, name):
+		try:
+			self.client.head_object(Bucket=self.bucket, Key=name)
+		except self.client.NoSuchKey:
+			return False
+		return True
+
+	def size(self, name):
+		return self.client.head_object(Bucket=self.bucket, Key=name)['ContentLength']
+
+	def modified_time(self, name):
+		return self.client.head_object(Bucket=self.bucket, Key=name)['LastModified']
+
+	get_modified_time = modified_time
+
+	def url(self, name):
+		return urljoin(self.base_url, filepath_to_uri(name))
+
+	def path(self, name):
+		if not hasattr(self.client, 'path'):
+			raise NotImplementedError("This backend doesn't support absolute paths.")
+		return self.client.path(name)
+
+	def iter_pages(self, prefix=''):
+		"""Yield the Contents lists of the listing of prefix, page by page"""
+		token = None
+		while True:
+			kwargs = {'Bucket': self.bucket, 'Prefix': prefix}
+			if token:
+				kwargs['ContinuationToken'] = token
+			response = self.client.list_objects_v2(**kwargs)
+			yield response.get('Contents', [])
+			if not response.get('IsTruncated'):
+				return
+			token = response['NextContinuationToken']
+
+	def iter_objects(self, prefix=''):
+		"""Yield the Contents entries of every object under prefix"""
+		for page in self.iter_pages(prefix):
+			yield from page
+
+	def listdir(self, path):
+		prefix = path.rstrip('/') + '/' if path else ''
+		directories, files = set(), []
+		for entry in self.iter_objects(prefix):
+			rest = entry['Key'][len(prefix):]
+			if '/' in rest:
+				directories.add(rest.split('/', 1)[0])
+			else:
+				files.append(rest)
+		return sorted(directories), files
+
@@ -1,3 +1,589 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.core.urlresolvers import resolve, reverse
+from django.db import IntegrityError
+from django.template.loader import get_template
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .admin import CourseAdmin, EstimatedCountPaginator, PaginatedInlineFormSet
+from .exports import chunks
+from .forms import content_form_class
+from .lazy import lazy_view
+from .management.commands.import_report import Command as ImportReportCommand
+from .management.commands.warm_cache import Command as WarmCacheCommand
+from .models import Track, Course, Module, Content, Text, File, Image, Video, Revision
+from .query_audit import QueryPlanAuditMixin
+from .ranking import by_enrollment
+from .rendering import ContentRenderer, content_renderer, timing_stats, reset_timings
+from .storage import ContentAddressedStorage
+from .versioning import diff, patch, get_state, record_revision, prune_revisions, item_state
+from .views import ModuleOrderView
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryPlanTest(QueryPlanAuditMixin, TestCase):
+	"""Every view in tracks/urls.py must be served from indexes"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.teacher = User.objects.create_superuser('teacher', 'teacher@example.com', 'secret')
+		cls.track = Track.objects.create(title='Grade 1', slug='grade-1')
+		cls.course = Course.objects.create(owner=cls.teacher, track=cls.track, title='Scales',
+											slug='scales', overview='Major and minor scales')
+		cls.module = Module.objects.create(course=cls.course, title='C major')
+		cls.text = Text.objects.create(owner=cls.teacher, title='Fingering', content='1 2 3 1 2 3 4 5')
+		cls.content = Content.objects.create(module=cls.module, item=cls.text)
+
+	def setUp(self):
+		super().setUp()
+		self.client.force_login(self.teacher)
+
+	def test_manage_course_list(self):
+		# grouping by course to sum the analytics rows needs a temporary B-tree
+		self.assertIndexedQueries('get', reverse('manage_course_list'), allow_sort=True)
+
+	def test_course_create(self):
+		self.assertIndexedQueries('get', reverse('course_create'))
+
+	def test_course_edit(self):
+		self.assertIndexedQueries('get', reverse('course_edit', args=[self.course.id]))
+
+	def test_course_delete(self):
+		self.assertIndexedQueries('get', reverse('course_delete', args=[self.course.id]))
+
+	def test_course_export(self):
+		self.course.students.add(self.teacher)
+		# counting the distinct modules viewed by each student groups in a temporary B-tree
+		self.assertIndexedQueries('get', reverse('course_export', args=[self.course.id, 'progress', 'csv']),
+								allow_sort=True)
+
+	def test_course_module_update(self):
+		self.assertIndexedQueries('get', reverse('course_module_update', args=[self.course.id]))
+
+	def test_module_content_create(self):
+		self.assertIndexedQueries('get', reverse('module_content_create', args=[self.module.id, 'text']))
+
+	def test_module_content_update(self):
+		self.assertIndexedQueries('get', reverse('module_content_update',
+												args=[self.module.id, 'text', self.text.id]))
+
+	def test_module_content_delete(self):
+		self.assertIndexedQueries('post', reverse('module_content_delete', args=[self.content.id]), {})
+
+	def test_module_content_list(self):
+		self.assertIndexedQueries('get', reverse('module_content_list', args=[self.module.id]))
+
+	def test_module_order(self):
+		self.assertIndexedQueries('post', reverse('module_order'), json.dumps({self.module.id: 0}),
+								content_type='application/json')
+
+	def test_content_order(self):
+		self.assertIndexedQueries('post', reverse('content_order'), json.dumps({self.content.id: 0}),
+								content_type='application/json')
+
+	def test_course_list(self):
+		# the catalog lists every course and groups them to count modules
+		self.assertIndexedQueries('get', reverse('course_list'),
+								allowed_scans=['tracks_course'], allow_sort=True)
+
+	def test_course_list_track(self):
+		# grouping by course to count modules needs a temporary B-tree
+		self.assertIndexedQueries('get', reverse('course_list_track', args=[self.track.slug]),
+								allow_sort=True)
+
+	def test_course_detail(self):
+		self.assertIndexedQueries('get', reverse('course_detail', args=[self.course.slug]))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WarmCacheTest(TransactionTestCase):
+
+	def setUp(self):
+		cache.clear()
+		self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+		track = Track.objects.create(title='Grade 1', slug='grade-1')
+		self.quiet = Course.objects.create(owner=self.teacher, track=track, title='Scales',
+										   slug='scales', overview='Major and minor scales')
+		self.busy = Course.objects.create(owner=self.teacher, track=track, title='Chords',
+										  slug='chords', overview='Triads')
+
+	def test_courses_are_ranked_by_enrollment_without_analytics(self):
+		self.busy.students.add(self.teacher)
+		details = [reverse('course_detail', args=[course.slug]) for course in (self.busy, self.quiet)]
+		with mock.patch('tracks.ranking.ranking', by_enrollment):
+			tasks = WarmCacheCommand().get_tasks()
+		self.assertEqual([target for kind, target in tasks if target in details], details)
+
+	def test_warmed_pages_are_not_served_to_logged_in_users(self):
+		out = StringIO()
+		call_command('warm_cache', '--host', 'testserver', stdout=out)
+		self.assertIn('0 failed', out.getvalue())
+		url = reverse('course_list')
+		# rendered responses carry their context, cached ones don't
+		self.assertIsNone(self.client.get(url).context)
+		self.client.force_login(self.teacher)
+		response = self.client.get(url)
+		self.assertIsNotNone(response.context)
+		self.assertContains(response, 'Sign out')
+
+
+class ExportTest(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+		track = Track.objects.create(title='Grade 1', slug='grade-1')
+		cls.course = Course.objects.create(owner=cls.teacher, track=track, title='Scales',
+											slug='scales', overview='Major and minor scales')
+		cls.students = [User.objects.create_user('student{}'.format(i), first_name='Clara', last_name='Wieck')
+						for i in range(3)]
+		cls.course.students.add(*cls.students)
+
+	def test_chunks(self):
+		usernames = User.objects.filter(courses_enrolled=self.course)
+		self.assertEqual(list(chunks(usernames, ['username'], chunk_size=2)),
+						 [[('student0',), ('student1',)], [('student2',)]])
+
+	def test_roster_csv(self):
+		out = StringIO()
+		call_command('export_data', 'roster', '--course', str(self.course.id), stdout=out)
+		self.assertEqual(out.getvalue().splitlines(),
+						 ['id,username,first_name,last_name,email'] +
+						 ['{},student{},Clara,Wieck,'.format(student.id, i) for i, student in enumerate(self.students)])
+
+	def test_catalog_jsonl(self):
+		out = StringIO()
+		call_command('export_data', 'catalog', '--format', 'jsonl', stdout=out)
+		[line] = out.getvalue().splitlines()
+		row = json.loads(line)
+		self.assertEqual((row['slug'], row['track_title'], row['owner_username']), ('scales', 'Grade 1', 'teacher'))
+		self.assertTrue(row['created'].startswith(self.course.created.strftime('%Y-%m-%dT%H:%M:%S')))
+
+	def test_view_streams_the_teachers_courses_only(self):
+		url = reverse('course_export', args=[self.course.id, 'roster', 'jsonl'])
+		self.client.force_login(self.teacher)
+		response = self.client.get(url)
+		self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+		self.assertEqual(response['Content-Disposition'], 'attachment; filename="scales-roster.jsonl"')
+		rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+		self.assertEqual([row['username'] for row in rows], ['student0', 'student1', 'student2'])
+		self.client.force_login(self.students[0])
+		self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class AdminTest(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.teacher = User.objects.create_superuser('teacher', 'teacher@example.com', 'secret')
+		cls.track = Track.objects.create(title='Grade 1', slug='grade-1')
+		cls.course = Course.objects.create(owner=cls.teacher, track=cls.track, title='Scales',
+											slug='scales', overview='Major and minor scales')
+		Course.objects.create(owner=cls.teacher, track=cls.track, title='Major scales',
+							  slug='major-scales', overview='Major scales only')
+		cls.modules = [Module.objects.create(course=cls.course, title='Key {}'.format(i)) for i in range(5)]
+
+	def setUp(self):
+		self.client.force_login(self.teacher)
+
+	def test_estimated_count_of_a_big_postgresql_table(self):
+		connection = mock.MagicMock(vendor='postgresql')
+		connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (20000.0,)
+		with mock.patch('tracks.admin.connections', {'default': connection}):
+			self.assertEqual(EstimatedCountPaginator(Course.objects.all(), 10).count, 20000)
+			# filtered lists are counted
+			self.assertEqual(EstimatedCountPaginator(Course.objects.filter(track=self.track), 10).count, 2)
+			connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (50.0,)
+			self.assertEqual(EstimatedCountPaginator(Course.objects.all(), 10).count, 2)
+
+	def test_count_elsewhere(self):
+		self.assertEqual(EstimatedCountPaginator(Course.objects.all(), 10).count, 2)
+
+	def test_search_matches_the_start_ignoring_case(self):
+		course_admin = CourseAdmin(Course, admin.site)
+		results, distinct = course_admin.get_search_results(None, Course.objects.all(), ' scales ')
+		self.assertEqual([course.slug for course in results], ['scales'])
+		self.assertFalse(distinct)
+		results, distinct = course_admin.get_search_results(None, Course.objects.all(), 'MAJOR')
+		self.assertEqual([course.slug for course in results], ['major-scales'])
+
+	def change(self, method='get', page=2, data=None):
+		url = reverse('admin:tracks_course_change', args=[self.course.id])
+		url += '?module_page={}&_changelist_filters=track__id__exact%3D{}'.format(page, self.track.id)
+		with mock.patch.object(PaginatedInlineFormSet, 'per_page', 2):
+			return getattr(self.client, method)(url, data)
+
+	def test_page_links_keep_the_other_parameters(self):
+		response = self.change()
+		formset = response.context['inline_admin_formsets'][0].formset
+		self.assertEqual([form.instance for form in formset.initial_forms], self.modules[2:4])
+		for page, label in ((1, 'previous'), (3, 'next')):
+			self.assertContains(response, '<a href="?module_page={}&amp;_changelist_filters=track__id__exact%3D{}">{}</a>'
+								.format(page, self.track.id, label), html=True)
+
+	def test_save_only_touches_the_page_shown(self):
+		data = {'owner': self.teacher.id, 'track': self.track.id, 'title': 'Scales', 'slug': 'scales',
+				'overview': 'Major and minor scales',
+				'modules-TOTAL_FORMS': 2, 'modules-INITIAL_FORMS': 2,
+				'modules-MIN_NUM_FORMS': 0, 'modules-MAX_NUM_FORMS': 1000}
+		for i, module in enumerate(self.modules[2:4]):
+			data.update({'modules-{}-id'.format(i): module.id, 'modules-{}-course'.format(i): self.course.id,
+						 'modules-{}-title'.format(i): 'Renamed {}'.format(i), 'modules-{}-order'.format(i): module.order})
+		response = self.change('post', data=data)
+		self.assertEqual(response.status_code, 302)
+		titles = list(Module.objects.filter(course=self.course).values_list('title', flat=True))
+		self.assertEqual(titles, ['Key 0', 'Key 1', 'Renamed 0', 'Renamed 1', 'Key 4'])
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+
+	def setUp(self):
+		self.location = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.location)
+		self.storage = ContentAddressedStorage(location=self.location, base_url='/media/')
+
+	def test_names_are_sharded_content_hashes(self):
+		name = self.storage.save('files/scales.PDF', ContentFile(b'C D E F G A B C'))
+		self.assertRegex(name, r'^files/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.pdf$')
+		with self.storage.open(name) as f:
+			self.assertEqual(f.read(), b'C D E F G A B C')
+		self.assertEqual(self.storage.url(name), '/media/' + name)
+
+	def test_identical_uploads_are_stored_once(self):
+		first = self.storage.save('files/a.pdf', ContentFile(b'arpeggio'))
+		second = self.storage.save('files/b.pdf', ContentFile(b'arpeggio'))
+		third = self.storage.save('files/c.pdf', ContentFile(b'cadence'))
+		self.assertEqual(first, second)
+		self.assertNotEqual(first, third)
+		keys = [entry['Key'] for entry in self.storage.iter_objects('files/')]
+		self.assertEqual(sorted(keys), sorted([first, third]))
+
+	def test_listing_is_paginated(self):
+		for i in range(5):
+			self.storage.save('images/{}.png'.format(i), ContentFile(str(i).encode()))
+		response = self.storage.client.list_objects_v2(Prefix='images/', MaxKeys=2)
+		self.assertTrue(response['IsTruncated'])
+		self.assertEqual(len(response['Contents']), 2)
+		self.assertEqual(len(list(self.storage.iter_objects('images/'))), 5)
+
+	def test_listing_is_in_key_order(self):
+		store = self.storage.client
+		keys = ['files/a.txt', 'files/a/b', 'files/a/c/d', 'files/a0', 'files/b', 'images/a']
+		for key in reversed(keys):
+			store.put_object(Key=key, Body=b'')
+		self.assertEqual([entry['Key'] for entry in self.storage.iter_objects('files/')], keys[:-1])
+		self.assertEqual([entry['Key'] for entry in self.storage.iter_objects('files/a')], keys[:-2])
+		response = store.list_objects_v2(Prefix='files/', ContinuationToken='files/a/b', MaxKeys=2)
+		self.assertEqual([entry['Key'] for entry in response['Contents']], ['files/a/c/d', 'files/a0'])
+
+	def test_later_pages_skip_the_directories_already_listed(self):
+		for i in range(20):
+			self.storage.save('files/{}.pdf'.format(i), ContentFile(str(i).encode()))
+		store = self.storage.client
+		token = store.list_objects_v2(Prefix='files/', MaxKeys=19)['NextContinuationToken']
+		with mock.patch('os.scandir', wraps=os.scandir) as scandir:
+			response = store.list_objects_v2(Prefix='files/', ContinuationToken=token)
+		self.assertEqual(response['KeyCount'], 1)
+		# files/, the two shard levels of the token and those of the last
+		# object, out of the 21 or more directories of a full walk
+		self.assertLessEqual(scandir.call_count, 5)
+
+	def test_delete(self):
+		name = self.storage.save('files/a.pdf', ContentFile(b'arpeggio'))
+		self.storage.delete(name)
+		self.assertFalse(self.storage.exists(name))
+
+	def test_saving_stored_content_refreshes_modified_time(self):
+		name = self.storage.save('files/a.pdf', ContentFile(b'arpeggio'))
+		os.utime(self.storage.path(name), (0, 0))
+		self.storage.save('files/b.pdf', ContentFile(b'arpeggio'))
+		self.assertGreater(self.storage.modified_time(name).year, 1970)
+
+
+class CollectMediaTest(TestCase):
+
+	def setUp(self):
+		location = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, location)
+		settings = override_settings(MEDIA_ROOT=location, DEFAULT_FILE_STORAGE='tracks.storage.ContentAddressedStorage')
+		settings.enable()
+		self.addCleanup(settings.disable)
+		self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+
+	def upload(self, title):
+		item = File(owner=self.owner, title=title)
+		item.file.save('scales.pdf', ContentFile(b'C D E F G A B C'))
+		return item
+
+	def collect(self, *args):
+		call_command('collect_media', *args, stdout=StringIO())
+
+	def test_shared_file_is_collected_once_unreferenced(self):
+		first, second = self.upload('Scales'), self.upload('More scales')
+		self.assertEqual(first.file.name, second.file.name)
+		storage = first.file.storage
+		first.delete()
+		self.collect('--grace', '0')
+		self.assertTrue(storage.exists(second.file.name))
+		second.delete()
+		self.assertTrue(storage.exists(second.file.name))
+		self.collect()
+		self.assertTrue(storage.exists(second.file.name))
+		self.collect('--grace', '0')
+		self.assertFalse(storage.exists(second.file.name))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RenderTimingsTest(TestCase):
+
+	def setUp(self):
+		# start from empty counters, in memory and in the cache
+		content_renderer.flush()
+		reset_timings()
+		owner = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+		self.text = Text.objects.create(owner=owner, title='Fingering', content='1 2 3\n1 2 3 4 5')
+
+	def test_render(self):
+		html = self.text.render()
+		self.assertEqual(html, '<p>1 2 3<br />1 2 3 4 5</p>')
+
+	def test_timings_are_shared_through_the_cache(self):
+		self.text.render()
+		self.text.render()
+		self.assertEqual(timing_stats(), [])
+		content_renderer.flush()
+		[(name, count, total, mean)] = timing_stats()
+		self.assertEqual((name, count), ('courses/content/text.html', 2))
+		self.assertGreaterEqual(total, mean)
+
+	def test_templates_are_compiled_once(self):
+		renderer = ContentRenderer()
+		with mock.patch('tracks.rendering.get_template', wraps=get_template) as lookup:
+			for i in range(3):
+				self.assertEqual(renderer.render(self.text), '<p>1 2 3<br />1 2 3 4 5</p>')
+		lookup.assert_called_once_with('courses/content/text.html')
+
+	def test_timings_are_flushed_when_the_request_finishes(self):
+		self.text.render()
+		request_finished.send(sender=self.__class__)
+		[(name, count, total, mean)] = timing_stats()
+		self.assertEqual((name, count), ('courses/content/text.html', 1))
+
+	def test_command(self):
+		self.text.render()
+		content_renderer.flush()
+		out = StringIO()
+		call_command('render_timings', '--reset', stdout=out)
+		self.assertIn('courses/content/text.html', out.getvalue())
+		self.assertEqual(timing_stats(), [])
+		out = StringIO()
+		call_command('render_timings', stdout=out)
+		self.assertIn('No content rendered yet.', out.getvalue())
+
+
+class VersioningTest(TestCase):
+
+	def setUp(self):
+		owner = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+		self.text = Text.objects.create(owner=owner, title='Fingering', content='')
+		self.states = []
+
+	def save(self, revisions):
+		for i in range(revisions):
+			self.text.content = ''.join('{} {}\n'.format(line, i if line % 3 == 0 else '') for line in range(i + 1))
+			self.text.save()
+			self.assertIsNotNone(record_revision(self.text))
+			self.states.append(item_state(self.text))
+
+	def revisions(self):
+		return Revision.objects.filter(object_id=self.text.id)
+
+	def test_diff_and_patch(self):
+		old = 'C\nD\nE\nF\n'
+		for new in ('C\nD\nE\nF\n', 'C\nE\nF\nG\n', 'A\nB\n', ''):
+			self.assertEqual(patch(old, diff(old, new)), new)
+		self.assertEqual(diff(old, old), [[0, 4]])
+
+	def test_snapshot_interval_and_get_state(self):
+		self.save(12)
+		self.assertEqual(list(self.revisions().filter(snapshot=True).values_list('number', flat=True)), [1, 11])
+		self.assertEqual([get_state(revision) for revision in self.revisions()], self.states)
+
+	def test_unchanged_item_is_not_recorded(self):
+		self.save(1)
+		self.assertIsNone(record_revision(self.text))
+		self.assertEqual(self.revisions().count(), 1)
+
+	def test_duplicate_number_is_retried(self):
+		self.save(1)
+		create = Revision.objects.create
+		calls = []
+
+		def conflict_once(**kwargs):
+			# the first attempt collides with a concurrent save of the item
+			calls.append(kwargs['number'])
+			if len(calls) == 1:
+				raise IntegrityError()
+			return create(**kwargs)
+
+		self.text.title = 'Scale fingering'
+		with mock.patch.object(Revision.objects, 'create', side_effect=conflict_once):
+			revision = record_revision(self.text)
+		self.assertEqual(calls, [2, 2])
+		self.assertEqual(get_state(revision)['title'], 'Scale fingering')
+		self.text.title = 'Arpeggio fingering'
+		with mock.patch.object(Revision.objects, 'create', side_effect=IntegrityError()):
+			self.assertRaises(IntegrityError, record_revision, self.text)
+
+	def test_prune_rewrites_the_oldest_kept_revision(self):
+		self.save(5)
+		self.assertEqual(prune_revisions(keep=2), 3)
+		revisions = list(self.revisions())
+		self.assertEqual([(r.number, r.snapshot) for r in revisions], [(4, True), (5, False)])
+		self.assertEqual([get_state(r) for r in revisions], self.states[3:])
+
+	def test_prune_removes_revisions_of_deleted_items(self):
+		self.save(2)
+		self.text.delete()
+		self.assertEqual(prune_revisions(keep=10), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReorderTest(TestCase):
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'secret')
+		track = Track.objects.create(title='Grade 1', slug='grade-1')
+		cls.course = Course.objects.create(owner=cls.teacher, track=track, title='Scales',
+											slug='scales', overview='Major and minor scales')
+		cls.first = Module.objects.create(course=cls.course, title='C major')
+		cls.second = Module.objects.create(course=cls.course, title='G major')
+
+	def setUp(self):
+		cache.clear()
+		self.client.force_login(self.teacher)
+
+	def post(self, seq=None, client='page', swapped=False, **payload):
+		order = {self.first.id: 1, self.second.id: 0} if swapped else {self.first.id: 0, self.second.id: 1}
+		data = dict(payload, order=order, client=client) if seq is not None else order
+		if seq is not None:
+			data['seq'] = seq
+		return self.client.post(reverse('module_order'), json.dumps(data), content_type='application/json')
+
+	def assertSwapped(self, swapped):
+		self.first.refresh_from_db()
+		self.assertEqual(self.first.order, 1 if swapped else 0)
+
+	def test_legacy_payload(self):
+		response = self.post(swapped=True)
+		self.assertEqual(json.loads(response.content.decode()), {'saved': 'OK'})
+		self.assertSwapped(True)
+
+	def test_older_post_from_the_same_page_is_superseded(self):
+		self.post(seq=2, swapped=True)
+		response = self.post(seq=1)
+		self.assertEqual(json.loads(response.content.decode()), {'saved': 'superseded'})
+		self.assertSwapped(True)
+
+	def test_posts_from_other_pages_are_written_in_arrival_order(self):
+		# a second device whose counter is behind still gets its order saved
+		self.post(seq=50, client='laptop', swapped=True)
+		self.post(seq=1, client='phone')
+		self.assertSwapped(False)
+
+	def test_rate_limited_order_is_kept_and_written_by_the_next_post(self):
+		self.post(seq=1)
+		with mock.patch.object(ModuleOrderView, 'rate_limited', return_value=True):
+			response = self.post(seq=2, swapped=True)
+		self.assertEqual(response.status_code, 429)
+		self.assertIn('retry_after', json.loads(response.content.decode()))
+		self.assertSwapped(False)
+		# a late post of an older drag writes the newer pending order
+		response = self.post(seq=1)
+		self.assertEqual(json.loads(response.content.decode()), {'saved': 'OK'})
+		self.assertSwapped(True)
+
+	def test_rate_limit(self):
+		with mock.patch.object(ModuleOrderView, 'rate_limit', 2):
+			statuses = [self.post(seq=seq).status_code for seq in range(3)]
+		self.assertEqual(statuses, [200, 200, 429])
+
+	def test_busy_lock_asks_to_retry(self):
+		cache.add('reorder_module_{}_{}_lock'.format(self.teacher.pk, self.course.id), 1)
+		with mock.patch.object(ModuleOrderView, 'lock_wait', 0):
+			response = self.post(seq=1, swapped=True)
+		self.assertEqual(response.status_code, 429)
+		self.assertSwapped(False)
+
+	def test_expired_lock_taken_by_another_request_is_not_released(self):
+		lock = 'reorder_module_{}_{}_lock'.format(self.teacher.pk, self.course.id)
+		view = ModuleOrderView()
+		token = view.acquire(lock)
+		# the lock times out and another request takes it
+		cache.delete(lock)
+		other = view.acquire(lock)
+		view.release(lock, token)
+		self.assertEqual(cache.get(lock), other)
+		view.release(lock, other)
+		self.assertIsNone(cache.get(lock))
+
+	def test_modules_of_several_courses_are_rejected(self):
+		other = Course.objects.create(owner=self.teacher, track=self.course.track, title='Chords',
+									  slug='chords', overview='Triads')
+		module = Module.objects.create(course=other, title='C major triad')
+		response = self.client.post(reverse('module_order'), json.dumps({self.first.id: 0, module.id: 1}),
+									content_type='application/json')
+		self.assertEqual(response.status_code, 400)
+
+
+class StartupTest(SimpleTestCase):
+
+	def test_lazy_view_is_built_on_the_first_request(self):
+		view = mock.Mock(return_value='response')
+		with mock.patch('tracks.lazy.import_string') as import_string:
+			import_string.return_value.as_view.return_value = view
+			lazy = lazy_view('tracks.views.CourseListView', template_name='list.html')
+			import_string.assert_not_called()
+			self.assertEqual([lazy('request', pk=1), lazy('request', pk=2)], ['response'] * 2)
+		import_string.assert_called_once_with('tracks.views.CourseListView')
+		import_string.return_value.as_view.assert_called_once_with(template_name='list.html')
+		self.assertEqual(view.call_args_list, [mock.call('request', pk=1), mock.call('request', pk=2)])
+
+	def test_reorder_urls_are_csrf_exempt(self):
+		for name in ('module_order', 'content_order'):
+			self.assertTrue(getattr(resolve(reverse(name)).func, 'csrf_exempt', False), name)
+
+	def test_course_list_is_not_lazy(self):
+		self.assertFalse(hasattr(resolve(reverse('course_list')).func, 'view_path'))
+
+	def test_content_form_classes_are_cached(self):
+		for model in (Text, File, Image, Video):
+			Form = content_form_class(model)
+			self.assertIs(content_form_class(model), Form)
+			self.assertFalse({'owner', 'order', 'created', 'updated'} & set(Form.base_fields))
+		self.assertIn('content', content_form_class(Text).base_fields)
+
+	def test_parse_import_report(self):
+		output = (
+			'import time: self [us] | cumulative | imported package\n'
+			'import time:       412 |        412 |   braces\n'
+			'import time:      1337 |       1749 | braces.views\n'
+			'Traceback lines are ignored\n'
+		)
+		self.assertEqual(ImportReportCommand().parse(output),
+						 [(412, 412, 'braces'), (1337, 1749, 'braces.views')])
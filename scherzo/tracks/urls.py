@@ -1,18 +1,20 @@
 from django.conf.urls import url
-from . import views
+from django.views.decorators.csrf import csrf_exempt
+from .lazy import lazy_view
 
 urlpatterns = [
-	url(r'^mine/$', views.ManageCourseListView.as_view(), name='manage_course_list'),
-	url(r'^create/$', views.CourseCreateView.as_view(), name='course_create'),
-	url(r'^(?P<pk>\d+)/edit/$', views.CourseUpdateView.as_view(), name='course_edit'),
-	url(r'^(?P<pk>\d+)/delete/$', views.CourseDeleteView.as_view(), name='course_delete'),
-	url(r'^(?P<pk>\d+)/module/$', views.CourseModuleUpdateView.as_view(), name='course_module_update'),
-	url(r'^module/(?P<module_id>\d+)/content/(?P<model_name>\w+)/create/$', views.ContentCreateUpdateView.as_view(), name='module_content_create'),
-	url(r'^module/(?P<module_id>\d+)/content/(?P<model_name>\w+)/(?P<id>\d+)/$', views.ContentCreateUpdateView.as_view(), name='module_content_update'),
-	url(r'^content/(?P<id>\d+)/delete/$', views.ContentDeleteView.as_view(), name='module_content_delete'),
-	url(r'^module/(?P<module_id>\d+)/$', views.ModuleContentListView.as_view(), name='module_content_list'),
-	url(r'^module/order/$', views.ModuleOrderView.as_view(), name='module_order'),
-	url(r'^content/order/$',views.ContentOrderView.as_view(), name='content_order'),
-	url(r'^track/(?P<track>[\w-]+)/$', views.CourseListView.as_view(), name='course_list_track'),
-	url(r'^(?P<slug>[\w-]+)/$', views.CourseDetailView.as_view(), name='course_detail'),
-]
\ No newline at end of file
+	url(r'^mine/$', lazy_view('tracks.views.ManageCourseListView'), name='manage_course_list'),
+	url(r'^create/$', lazy_view('tracks.views.CourseCreateView'), name='course_create'),
+	url(r'^(?P<pk>\d+)/edit/$', lazy_view('tracks.views.CourseUpdateView'), name='course_edit'),
+	url(r'^(?P<pk>\d+)/delete/$', lazy_view('tracks.views.CourseDeleteView'), name='course_delete'),
+	url(r'^(?P<pk>\d+)/export/(?P<report>roster|progress)\.(?P<format>csv|jsonl)$', lazy_view('tracks.views.CourseExportView'), name='course_export'),
+	url(r'^(?P<pk>\d+)/module/$', lazy_view('tracks.views.CourseModuleUpdateView'), name='course_module_update'),
+	url(r'^module/(?P<module_id>\d+)/content/(?P<model_name>\w+)/create/$', lazy_view('tracks.views.ContentCreateUpdateView'), name='module_content_create'),
+	url(r'^module/(?P<module_id>\d+)/content/(?P<model_name>\w+)/(?P<id>\d+)/$', lazy_view('tracks.views.ContentCreateUpdateView'), name='module_content_update'),
+	url(r'^content/(?P<id>\d+)/delete/$', lazy_view('tracks.views.ContentDeleteView'), name='module_content_delete'),
+	url(r'^module/(?P<module_id>\d+)/$', lazy_view('tracks.views.ModuleContentListView'), name='module_content_list'),
+	url(r'^module/order/$', csrf_exempt(lazy_view('tracks.views.ModuleOrderView')), name='module_order'),
+	url(r'^content/order/$', csrf_exempt(lazy_view('tracks.views.ContentOrderView')), name='content_order'),
+	url(r'^track/(?P<track>[\w-]+)/$', lazy_view('tracks.views.CourseListView'), name='course_list_track'),
+	url(r'^(?P<slug>[\w-]+)/$', lazy_view('tracks.views.CourseDetailView'), name='course_detail'),
+]
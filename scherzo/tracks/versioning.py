@@ -0,0 +1,166 @@
+"""
+Revision history of the content items.
+
+Every save of a Text, File, Image or Video through the content form
+records a Revision. A full snapshot of the versioned fields is stored
+every SNAPSHOT_INTERVAL revisions; the revisions in between only store
+the fields that changed, and for the long text fields a line diff
+against the previous revision. Payloads are JSON compressed with zlib.
+Rebuilding a revision reads its closest snapshot and applies at most
+SNAPSHOT_INTERVAL - 1 deltas.
+"""
+
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from .models import Revision
+
+
+SNAPSHOT_INTERVAL = 10
+DIFF_FIELDS = ('content',)
+UNVERSIONED_FIELDS = ('id', 'owner', 'created', 'updated')
+
+
+def encode(payload):
+	return zlib.compress(json.dumps(payload).encode('utf-8'))
+
+
+def decode(data):
+	return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def item_state(item):
+	"""Return the versioned fields of a content item as strings"""
+	return {field.name: field.value_to_string(item)
+			for field in item._meta.concrete_fields
+			if field.name not in UNVERSIONED_FIELDS}
+
+
+def diff(old, new):
+	"""Return the operations that turn the old text into the new one:
+	[start, end] copies lines of the old text, a string is inserted."""
+	old_lines, new_lines = old.splitlines(True), new.splitlines(True)
+	ops = []
+	for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+		if tag == 'equal':
+			ops.append([i1, i2])
+		elif j2 > j1:
+			ops.append(''.join(new_lines[j1:j2]))
+	return ops
+
+
+def patch(old, ops):
+	old_lines = old.splitlines(True)
+	return ''.join(op if isinstance(op, str) else ''.join(old_lines[op[0]:op[1]]) for op in ops)
+
+
+def delta(previous, state):
+	changes = {}
+	for field, value in state.items():
+		if previous.get(field) == value:
+			continue
+		if field in DIFF_FIELDS and field in previous:
+			changes[field] = diff(previous[field], value)
+		else:
+			changes[field] = value
+	return changes
+
+
+def apply_delta(previous, changes):
+	state = dict(previous)
+	for field, value in changes.items():
+		if field in DIFF_FIELDS and field in previous:
+			state[field] = patch(previous[field], value)
+		else:
+			state[field] = value
+	return state
+
+
+def get_state(revision):
+	"""Rebuild the versioned fields as they were at the given revision"""
+	revisions = Revision.objects.filter(content_type_id=revision.content_type_id, object_id=revision.object_id)
+	start = revisions.filter(snapshot=True, number__lte=revision.number) \
+					 .order_by('-number').values_list('number', flat=True).first()
+	state = None
+	for snapshot, data in revisions.filter(number__gte=start, number__lte=revision.number) \
+								   .order_by('number').values_list('snapshot', 'data'):
+		payload = decode(data)
+		state = payload if snapshot else apply_delta(state, payload)
+	return state
+
+
+def record_revision(item, author=None, attempts=3):
+	"""Store the current state of the item as a new revision.
+	Nothing is stored when the versioned fields did not change.
+
+	The item row is locked while the next number is read, so concurrent
+	saves of an item are numbered one after the other. Databases that
+	can't lock rows raise IntegrityError on the duplicate number
+	instead, and the revision is computed again."""
+	content_type = ContentType.objects.get_for_model(item)
+	state = item_state(item)
+	for attempt in range(attempts):
+		try:
+			with transaction.atomic():
+				list(type(item)._default_manager.select_for_update().filter(pk=item.pk).values_list('pk'))
+				return create_revision(content_type, item, state, author)
+		except IntegrityError:
+			if attempt == attempts - 1:
+				raise
+
+
+def create_revision(content_type, item, state, author):
+	last = Revision.objects.filter(content_type=content_type, object_id=item.pk) \
+						   .order_by('-number').first()
+	if last is None:
+		number, snapshot, payload = 1, True, state
+	else:
+		previous = get_state(last)
+		if previous == state:
+			return None
+		number = last.number + 1
+		snapshot = (number - 1) % SNAPSHOT_INTERVAL == 0
+		payload = state if snapshot else delta(previous, state)
+	return Revision.objects.create(content_type=content_type, object_id=item.pk, number=number,
+								   snapshot=snapshot, data=encode(payload), author=author)
+
+
+def prune_revisions(keep, before=None):
+	"""Delete the revisions of every item except the latest `keep` ones
+	and, if given, those created at or after `before`. The oldest kept
+	revision is rewritten as a snapshot so it can still be rebuilt.
+	Revisions of deleted items are removed. Returns the number deleted.
+	"""
+	deleted = 0
+	for content_type in ContentType.objects.filter(id__in=Revision.objects.values('content_type')):
+		model = content_type.model_class()
+		orphans = Revision.objects.filter(content_type=content_type)
+		if model is not None:
+			orphans = orphans.exclude(object_id__in=model.objects.values('id'))
+		deleted += orphans.delete()[0]
+
+	items = Revision.objects.values('content_type', 'object_id') \
+							.annotate(total=Count('id')) \
+							.filter(total__gt=keep) \
+							.order_by()
+	for item in items:
+		revisions = Revision.objects.filter(content_type_id=item['content_type'], object_id=item['object_id'])
+		kept = list(revisions.order_by('-number')[:keep]) if keep else []
+		if before is not None:
+			kept += list(revisions.filter(created__gte=before).exclude(id__in=[r.id for r in kept]))
+		if not kept:
+			deleted += revisions.delete()[0]
+			continue
+		oldest = min(kept, key=lambda r: r.number)
+		with transaction.atomic():
+			if not oldest.snapshot:
+				oldest.data = encode(get_state(oldest))
+				oldest.snapshot = True
+				oldest.save(update_fields=['data', 'snapshot'])
+			deleted += revisions.filter(number__lt=oldest.number).delete()[0]
+	return deleted
@@ -1,3 +1,6 @@
+import time
+import uuid
+
 from braces.views import LoginRequiredMixin, PermissionRequiredMixin
 from braces.views import CsrfExemptMixin, JsonRequestResponseMixin
 
@@ -6,14 +9,16 @@ from django.views.generic.list import ListView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic.detail import DetailView
 from django.shortcuts import redirect, get_object_or_404
+from django.http import Http404, StreamingHttpResponse
 from django.views.generic.base import TemplateResponseMixin, View
-from django.forms.models import modelform_factory
 from django.apps import apps
-from django.db.models import Count
+from django.db.models import Count, Sum, Case, When, Value, PositiveIntegerField
 
 
-from .forms import ModuleFormSet
+from .exports import export_lines, CONTENT_TYPES, REPORTS
+from .forms import ModuleFormSet, content_form_class
 from .models import Course, Module, Content, Track
+from .versioning import record_revision
 from students.forms import CourseEnrollForm
 from django.core.cache import cache
 
@@ -43,8 +48,15 @@ class OwnerCourseEditMixin(OwnerCourseMixin, OwnerEditMixin):
 
 
 class ManageCourseListView(OwnerCourseMixin, ListView):
+	"""Courses of the teacher with their enrollments and views,
+	summed from the precomputed analytics rows."""
 	template_name = 'courses/manage/course/list.html'
 
+	def get_queryset(self):
+		qs = super().get_queryset()
+		return qs.annotate(total_enrollments=Sum('activity__enrollments'),
+						   total_views=Sum('activity__views'))
+
 
 class CourseCreateView(PermissionRequiredMixin, OwnerCourseEditMixin, CreateView):
 	permission_required = 'courses.add_course'
@@ -83,6 +95,18 @@ class CourseModuleUpdateView(TemplateResponseMixin, View):
 		return self.render_to_response({'course': self.course, 'formset': formset})
 
 
+class CourseExportView(LoginRequiredMixin, View):
+	"""Stream the roster or the progress report of one of the teacher's
+	courses as CSV or JSON lines"""
+	def get(self, request, pk, report, format):
+		if report not in REPORTS:
+			raise Http404('No {} report.'.format(report))
+		course = get_object_or_404(Course, id=pk, owner=request.user)
+		response = StreamingHttpResponse(export_lines(report, format, course), content_type=CONTENT_TYPES[format])
+		response['Content-Disposition'] = 'attachment; filename="{}-{}.{}"'.format(course.slug, report, format)
+		return response
+
+
 class ContentCreateUpdateView(TemplateResponseMixin, View):
 	module = None
 	model = None
@@ -95,12 +119,12 @@ class ContentCreateUpdateView(TemplateResponseMixin, View):
 		class for the given model name.
 		"""
 		if model_name in ['text', 'video', 'image', 'file']:
-			return apps.get_model(app_label='courses', model_name=model_name)
+			return apps.get_model(app_label='tracks', model_name=model_name)
 		return None
 
 	def get_form(self, model, *args, **kwargs):
-		"""Build a dynamic form and exclude the specified files"""
-		Form = modelform_factory(model, exclude=['owner', 'order', 'created', 'updated'])
+		"""Build a form from the cached form class of the content model"""
+		Form = content_form_class(model)
 		return Form(*args, **kwargs)
 
 	def dispatch(self, request, module_id, model_name, id=None):
@@ -128,6 +152,7 @@ class ContentCreateUpdateView(TemplateResponseMixin, View):
 			obj = form.save(commit=False)
 			obj.owner = request.user
 			obj.save()
+			record_revision(obj, request.user)
 			if not id:
 				# new content
 				Content.objects.create(module=self.module, item=obj)
@@ -144,6 +169,7 @@ class ContentDeleteView(View):
 		content = get_object_or_404(Content, id=id, module__course__owner=request.user)
 		module = content.module
 		content.item.delete()
+		content.delete()
 		return redirect('module_content_list', module.id)
 
 
@@ -158,20 +184,128 @@ class ModuleContentListView(TemplateResponseMixin, View):
 		return self.render_to_response({'module': module})
 
 
-class ModuleOrderView(CsrfExemptMixin, JsonRequestResponseMixin, View):
-	"""Reorder modules based on the DnD interface"""
+class ReorderMixin(CsrfExemptMixin, JsonRequestResponseMixin):
+	"""Save the order posted by the DnD interface.
+
+	Every drag stop posts {'client': id, 'seq': n, 'order': {id: order}},
+	where client identifies the open page and seq counts its posts. Posts
+	are handled one at a time per user and per course or module, under a
+	lock in the cache. A post older than one already written from the same
+	page is dropped as superseded; otherwise the latest post to arrive is
+	written. Posts over the rate limit, or that can't get the lock in time,
+	get a 429 with retry_after. Their order is kept as pending and written
+	by the next post from the same page. A plain {id: order} mapping is
+	written in arrival order.
+	"""
+	model = None
+	owner_field = None
+	scope_field = None
+	rate_limit = 60
+	lock_timeout = 10
+	lock_wait = 2
+	state_timeout = 60 * 60
+
 	def post(self, request):
-		for id, order in self.request_json.items():
-			Module.objects.filter(id=id, course__owner=request.user).update(order=order)
+		data = self.request_json
+		if not isinstance(data, dict):
+			return self.render_bad_request_response()
+		if 'order' in data:
+			client, seq, order = str(data.get('client', '')), data.get('seq'), data['order']
+		else:
+			client, seq, order = '', None, data
+		try:
+			seq = int(seq) if seq is not None else None
+			order = {int(id): int(position) for id, position in order.items()}
+		except (AttributeError, TypeError, ValueError):
+			return self.render_bad_request_response()
+
+		scopes = set(self.get_queryset(order).values_list(self.scope_field, flat=True))
+		if not scopes:
+			return self.render_json_response({'saved': 'OK'})
+		if len(scopes) > 1:
+			return self.render_bad_request_response()
+
+		key = 'reorder_{}_{}_{}'.format(self.model._meta.model_name, request.user.pk, scopes.pop())
+		limited = self.rate_limited(request.user)
+		token = self.acquire(key + '_lock')
+		if token is None:
+			return self.render_retry_response(1)
+		try:
+			state = cache.get(key) or {'written': {}, 'pending': None}
+			post = (client, seq, order)
+			pending = state['pending']
+			if pending and pending[0] == client and self.is_newer(pending, post):
+				post = pending
+			if post[1] is not None and post[1] <= state['written'].get(client, -1):
+				return self.render_json_response({'saved': 'superseded'})
+			if limited:
+				state['pending'] = post
+				cache.set(key, state, self.state_timeout)
+				return self.render_retry_response(60 - int(time.time()) % 60)
+			self.write_order(post[2])
+			if post[1] is not None:
+				state['written'][client] = post[1]
+			state['pending'] = None
+			cache.set(key, state, self.state_timeout)
+		finally:
+			self.release(key + '_lock', token)
 		return self.render_json_response({'saved': 'OK'})
 
+	def is_newer(self, post, other):
+		return post[1] is not None and (other[1] is None or post[1] > other[1])
+
+	def acquire(self, lock):
+		"""Wait up to lock_wait seconds for the lock. Return the token
+		identifying this holder, or None if the lock wasn't free in time."""
+		token = uuid.uuid4().hex
+		deadline = time.monotonic() + self.lock_wait
+		while not cache.add(lock, token, self.lock_timeout):
+			if time.monotonic() > deadline:
+				return None
+			time.sleep(0.01)
+		return token
+
+	def release(self, lock, token):
+		"""Delete the lock unless it expired and another request took it"""
+		if cache.get(lock) == token:
+			cache.delete(lock)
+
+	def rate_limited(self, user):
+		key = 'reorder_rate_{}_{}'.format(user.pk, int(time.time() // 60))
+		cache.add(key, 0, 60)
+		try:
+			return cache.incr(key) > self.rate_limit
+		except ValueError:
+			# the counter expired in between
+			return False
+
+	def render_retry_response(self, retry_after):
+		response = self.render_json_response({'saved': 'queued', 'retry_after': retry_after}, status=429)
+		response['Retry-After'] = retry_after
+		return response
+
+	def get_queryset(self, order):
+		return self.model.objects.filter(id__in=list(order), **{self.owner_field: self.request.user})
+
+	def write_order(self, order):
+		"""Update all the rows with a single query"""
+		positions = Case(*[When(id=id, then=Value(position)) for id, position in order.items()],
+						 output_field=PositiveIntegerField())
+		self.get_queryset(order).update(order=positions)
+
+
+class ModuleOrderView(ReorderMixin, View):
+	"""Reorder modules based on the DnD interface"""
+	model = Module
+	owner_field = 'course__owner'
+	scope_field = 'course'
+
 
-class ContentOrderView(CsrfExemptMixin, JsonRequestResponseMixin, View):
+class ContentOrderView(ReorderMixin, View):
 	"""Reorder contents based on the DnD interface"""
-	def post(self, request):
-		for id, order in self.request_json.items():
-			Content.objects.filter(id=id, module__course__owner=request.user).update(order=order)
-		return self.render_json_response({'saved': 'OK'})
+	model = Content
+	owner_field = 'module__course__owner'
+	scope_field = 'module'
 
 
 class CourseListView(TemplateResponseMixin, View):
@@ -185,27 +319,29 @@ class CourseListView(TemplateResponseMixin, View):
 	template_name = 'courses/course/list.html'
 
 	def get(self, request, track=None):
-		tracks = cache.get('all_tracks')
-		if not tracks:
-			tracks = Track.objects.annotate(total_courses=Count('courses'))
-			cache.set('all_tracks', tracks)	
-		all_courses = Course.objects.annotate(total_modules=Count('modules'))
+		# fetch the independent cache entries in a single round trip
+		courses_key = 'track_{}_courses'.format(track) if track else 'all_courses'
+		cached = cache.get_many(['all_tracks', courses_key])
+		tracks = cached.get('all_tracks')
+		if tracks is None:
+			tracks = list(Track.objects.annotate(total_courses=Count('courses')))
+			cache.set('all_tracks', tracks)
 		if track:
-			track = get_object_or_404(Track, slug=track)
-			key = 'track_{}_courses'.format(track.id)
-			courses = cache.get(key)
-			if not courses:
+			# the track is usually in the cached list, a new one may not be yet
+			slug = track
+			track = next((t for t in tracks if t.slug == slug), None) or get_object_or_404(Track, slug=slug)
+		courses = cached.get(courses_key)
+		if courses is None:
+			courses = Course.objects.select_related('track', 'owner').annotate(total_modules=Count('modules'))
+			if track:
 				courses = courses.filter(track=track)
-				cache.set(key, courses)
-		else:
-			courses = cache.get('all_courses')
-			if not courses:
-				courses = all_courses
-				cache.set('all_courses', courses)
+			courses = list(courses)
+			cache.set(courses_key, courses)
 		return self.render_to_response({'tracks': tracks,
 										'track': track,
 										'courses': courses})
 
+
 class CourseDetailView(DetailView):
 	model = Course
 	template_name = 'courses/course/detail.html'